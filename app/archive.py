@@ -0,0 +1,137 @@
+"""Archive of raw payloads fetched by the ingestors, for offline replay"""
+
+import gzip
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import RawPayload
+
+
+class RawArchive:
+    """
+    Content-addressed store of raw payloads (feed bodies, API responses, emails)
+
+    Payloads are gzip-compressed into files named by the SHA-256 of their content, so
+    unchanged bodies fetched again are stored once. The raw_payloads table indexes them by
+    source, kind, locator (feed URL, API topic, message ID) and first fetch time.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def store(
+        self,
+        source_id: int,
+        kind: str,
+        locator: str,
+        body: bytes,
+        fetched_at: Optional[datetime] = None,
+    ) -> str:
+        """
+        Archive a payload and index it
+
+        Args:
+            source_id: Source the payload was fetched for
+            kind: Payload kind, e.g. "feed", "reuters_api" or "gmail_message"
+            locator: What was fetched (feed URL, API topic, message ID)
+            body: Raw payload bytes
+            fetched_at: UTC fetch time (default: now)
+
+        Returns:
+            SHA-256 digest of the payload
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._path(digest)
+
+        if not path.exists():
+            # Write atomically so concurrent readers never see a partial file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(gzip.compress(body, compresslevel=6))
+            os.replace(tmp_path, path)
+
+        with Session(engine) as session:
+            exists = session.exec(
+                select(RawPayload.id).where(
+                    RawPayload.kind == kind,
+                    RawPayload.locator == locator,
+                    RawPayload.digest == digest,
+                )
+            ).first()
+            if exists is None:
+                session.add(
+                    RawPayload(
+                        source_id=source_id,
+                        kind=kind,
+                        locator=locator,
+                        digest=digest,
+                        size=len(body),
+                        fetched_at=fetched_at or datetime.utcnow(),
+                    )
+                )
+                try:
+                    session.commit()
+                except IntegrityError:
+                    session.rollback()  # Indexed concurrently by another fetch
+
+        return digest
+
+    def load(self, digest: str) -> Optional[bytes]:
+        """
+        Read an archived payload
+
+        Args:
+            digest: SHA-256 digest returned by store()
+
+        Returns:
+            Payload bytes, or None if the file is missing
+        """
+        try:
+            return gzip.decompress(self._path(digest).read_bytes())
+        except OSError:
+            return None
+
+    def payloads(
+        self,
+        kind: str,
+        start: datetime,
+        end: datetime,
+        source_id: Optional[int] = None,
+        locator: Optional[str] = None,
+    ) -> List[RawPayload]:
+        """
+        List payloads of a kind first fetched within a time window, oldest first
+
+        Args:
+            kind: Payload kind
+            start: Window start (naive UTC)
+            end: Window end (naive UTC)
+            source_id: Restrict to payloads fetched for this source
+            locator: Restrict to payloads with this locator
+
+        Returns:
+            List of RawPayload index rows
+        """
+        query = select(RawPayload).where(
+            RawPayload.kind == kind,
+            RawPayload.fetched_at >= start,
+            RawPayload.fetched_at <= end,
+        )
+        if source_id is not None:
+            query = query.where(RawPayload.source_id == source_id)
+        if locator is not None:
+            query = query.where(RawPayload.locator == locator)
+
+        with Session(engine) as session:
+            return session.exec(query.order_by(RawPayload.fetched_at)).all()
+
+    def _path(self, digest: str) -> Path:
+        """File path for a payload digest"""
+        return self.directory / digest[:2] / f"{digest}.gz"
@@ -0,0 +1,129 @@
+"""Local on-disk cache"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+
+def content_key(namespace: str, version: str, *fields: Any) -> str:
+    """
+    Build a cache key from the content of some fields
+
+    Args:
+        namespace: What is cached (e.g. "normalize")
+        version: Version of the code and configuration producing the cached value
+        fields: JSON-serializable inputs the value is derived from
+
+    Returns:
+        Key that changes whenever the version or any field does
+    """
+    digest = hashlib.sha256(json.dumps(fields, default=str).encode("utf-8")).hexdigest()
+    return f"{namespace}:{version}:{digest}"
+
+
+class DiskCache:
+    """
+    Content-addressed JSON cache on local disk with size-based LRU eviction
+
+    Each key is stored in its own file named by the SHA-256 of the key. Reads refresh the
+    file's modification time, and the least recently used files are removed once the
+    cache grows past `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            return None
+
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def set(self, key: str, value: Any):
+        """
+        Store a JSON-serializable value
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        path = self._path(key)
+        data = json.dumps(value).encode("utf-8")
+
+        current_size = self.size()
+        try:
+            previous = path.stat().st_size
+        except OSError:
+            previous = 0
+
+        # Write atomically so concurrent readers never see a partial file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        self._size = current_size + len(data) - previous
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def size(self) -> int:
+        """Total size of cached values in bytes"""
+        if self._size is None:
+            self._size = sum(path.stat().st_size for path in self._files())
+        return self._size
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is below 90% of its budget"""
+        files = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * 0.9)
+
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+
+        self._size = total
+
+    def _files(self):
+        """Iterate over cache files"""
+        if not self.directory.exists():
+            return []
+        return self.directory.glob("*/*.json")
+
+    def _path(self, key: str) -> Path:
+        """File path for a key"""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.json"
@@ -50,10 +50,76 @@ class Settings(BaseSettings):
     telegram_bot_token: Optional[str] = None
     telegram_chat_id: Optional[str] = None
 
+    # HTTP client (shared by ingestors and processors)
+    http_timeout: float = 30.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_http2: bool = True
+    http_user_agent: str = "MENA-Digest/1.0"
+
+    # Fetching
+    fetch_concurrency: int = 10  # Sources fetched at once
+    fetch_per_host_concurrency: int = 2  # Sources fetched at once from the same host
+    rss_max_bytes: int = 5_000_000  # Download budget per feed
+    rss_cutoff_streak: int = 5  # Stop reading after this many entries in a row are too old
+    fetch_run_budget_seconds: int = 180  # Whole fetch stage, so the digest goes out on time
+    fetch_source_timeout_seconds: int = 45  # Per source, including any fallback fetches
+
+    # Circuit breaker for sources that keep failing
+    breaker_failure_threshold: int = 3  # Consecutive failures before a source is skipped
+    breaker_backoff_minutes: int = 30  # First skip period, doubled on each further failure
+    breaker_max_backoff_minutes: int = 1440
+
+    # Local caches
+    cache_dir: str = ".cache"
+    gmail_cache_max_bytes: int = 50_000_000
+    canonical_cache_max_bytes: int = 20_000_000
+    canonical_cache_ttl_hours: int = 720  # Canonical URLs rarely change once published
+    canonical_cache_negative_ttl_minutes: int = 360  # Retry failed lookups after this
+    processing_cache_enabled: bool = True  # Reuse normalize/classify results for seen content
+    processing_cache_max_bytes: int = 100_000_000  # Split evenly by normalize and classify
+    archive_enabled: bool = True  # Keep raw payloads under cache_dir/archive for replay
+
+    # Known-URL filter: entries already stored are dropped at parse time
+    known_urls_enabled: bool = True
+    known_urls_capacity: int = 200_000
+    known_urls_error_rate: float = 0.0001  # Chance of wrongly skipping a new entry
+
+    # Canonical URL lookups for digest candidates
+    canonical_rules_path: str = "canonical_rules.yaml"  # Offline rules, tried before lookups
+    normalize_concurrency: int = 20  # Lookups in flight at once
+    normalize_domain_interval_seconds: float = 0.5  # Spacing between lookups on one domain
+    normalize_stage_timeout_seconds: int = 60  # Remaining articles keep their cleaned URL
+    canonical_candidate_factor: float = 1.5  # Digest candidates resolved, as a multiple of K
+    canonical_head_max_bytes: int = 131_072  # Stop reading a page after this without </head>
+
+    # Classification and ranking
+    keywords_path: str = "keywords.yaml"  # Keyword and weight tables, reloaded when changed
+    classifier_model_path: str = "classifier_model.npz"  # Trained model; keywords if missing
+    classifier_min_confidence: float = 0.7  # Below this, an article is tagged by keywords
+
+    # Parsing (feedparser, readability) off the event loop
+    parse_executor: str = "thread"  # "thread" or "process"
+    parse_workers: int = 4
+    clean_shard_size: int = 500  # Articles per text-cleaning task; smaller batches run inline
+
     # Scheduler
     digest_schedule_hour: int = 8
     digest_schedule_minute: int = 30
 
+    # Background ingestion
+    ingest_enabled: bool = True
+    ingest_tick_seconds: int = 60  # How often to check which sources are due
+    ingest_poll_interval_minutes: int = 15  # Default per-source poll interval
+    ingest_lookback_hours: int = 24
+
+    # WebSub push (disabled unless this service is reachable at a public URL)
+    websub_callback_base_url: Optional[str] = None
+    websub_lease_seconds: int = 432000  # 5 days
+    websub_renew_margin_seconds: int = 86400
+    websub_fallback_poll_minutes: int = 360  # Polling interval for pushed sources
+
     # App settings
     app_host: str = "0.0.0.0"
     app_port: int = 8000
@@ -0,0 +1,105 @@
+"""Shared, pooled HTTP client"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+import httpx
+
+from app.config import settings
+
+# HTTP/2 and brotli are optional extras of httpx; only advertise what we can decode
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import brotli  # noqa: F401
+
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+
+T = TypeVar("T")
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create a pooled client to be shared by all ingestors and processors of a run
+
+    Returns:
+        httpx.AsyncClient with keep-alive, HTTP/2 (when available) and compression
+    """
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+
+    return httpx.AsyncClient(
+        http2=settings.http_http2 and HTTP2_AVAILABLE,
+        limits=limits,
+        timeout=settings.http_timeout,
+        follow_redirects=True,
+        headers={
+            "User-Agent": settings.http_user_agent,
+            "Accept-Encoding": ACCEPT_ENCODING,
+        },
+    )
+
+
+@asynccontextmanager
+async def shared_client(
+    client: Optional[httpx.AsyncClient] = None,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Use the injected client, or a short-lived one when running standalone
+
+    Args:
+        client: Shared client, or None
+
+    Yields:
+        httpx.AsyncClient (closed on exit only if created here)
+    """
+    if client is not None:
+        yield client
+        return
+
+    async with create_http_client() as owned_client:
+        yield owned_client
+
+
+class SingleFlight:
+    """
+    Coalesces identical fetches within one pipeline run
+
+    The first caller for a key starts the work; concurrent and later callers in the same
+    run await the same result (or exception) instead of fetching again.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run func once per key and share its result
+
+        Args:
+            key: Identity of the work, e.g. a feed URL
+            func: Coroutine function performing the work
+
+        Returns:
+            Result of the single call for this key
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+
+        # Shield so one consumer timing out does not cancel the fetch for the others
+        return await asyncio.shield(call)
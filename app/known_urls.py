@@ -0,0 +1,186 @@
+"""Persistent probabilistic set of already-ingested article URLs"""
+
+import hashlib
+import math
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlmodel import Session, func, select
+
+from app.config import settings
+from app.database import engine
+from app.models import Article
+from app.processors.deduplicator import url_hash
+
+HEADER = struct.Struct("<4sQQQQ")  # magic, bits, hashes, capacity, count
+MAGIC = b"BLM1"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys
+
+    Membership tests can return false positives (at roughly `error_rate` once `capacity`
+    keys are added) but never false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.0001):
+        self.capacity = max(1, capacity)
+        self.num_bits = max(64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def add(self, key: str):
+        """Add a key"""
+        added = False
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(key)
+        )
+
+    @property
+    def is_full(self) -> bool:
+        """Whether the filter holds more keys than it was sized for"""
+        return self.count > self.capacity
+
+    def to_bytes(self) -> bytes:
+        """Serialize the filter"""
+        header = HEADER.pack(MAGIC, self.num_bits, self.num_hashes, self.capacity, self.count)
+        return header + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        """
+        Deserialize a filter written by to_bytes()
+
+        Raises:
+            ValueError: If the data is not a serialized filter
+        """
+        if len(data) < HEADER.size:
+            raise ValueError("Truncated Bloom filter")
+        magic, num_bits, num_hashes, capacity, count = HEADER.unpack_from(data)
+        bits = data[HEADER.size :]
+        if magic != MAGIC or len(bits) != (num_bits + 7) // 8:
+            raise ValueError("Not a Bloom filter")
+
+        bloom = cls.__new__(cls)
+        bloom.capacity, bloom.num_bits, bloom.num_hashes = capacity, num_bits, num_hashes
+        bloom.bits = bytearray(bits)
+        bloom.count = count
+        return bloom
+
+    def _positions(self, key: str):
+        """Bit positions of a key, by double hashing one 128-bit digest"""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+
+_known: Optional[BloomFilter] = None
+
+
+def is_known(url: str) -> bool:
+    """
+    Check whether an article URL was probably ingested before
+
+    Args:
+        url: Article URL as found in the source (before normalization)
+
+    Returns:
+        True if the URL (or its canonical form) is probably stored already
+    """
+    if not settings.known_urls_enabled or not url:
+        return False
+    return url_hash(url) in _get_filter()
+
+
+def remember(keys: Iterable[str]):
+    """
+    Add content hashes of ingested articles and persist the filter
+
+    Args:
+        keys: Content hashes, and url_hash() of the URLs the articles were found under
+    """
+    if not settings.known_urls_enabled:
+        return
+
+    bloom = _get_filter()
+    for key in keys:
+        bloom.add(key)
+
+    if bloom.is_full:
+        bloom = rebuild()
+    else:
+        _save(bloom)
+
+
+def rebuild() -> BloomFilter:
+    """Rebuild the filter from the content hashes in the articles table"""
+    global _known
+
+    stored = _stored_count()
+    with Session(engine) as session:
+        # Leave headroom so the filter is not rebuilt again on the next few ingests
+        bloom = BloomFilter(
+            max(settings.known_urls_capacity, stored * 2), settings.known_urls_error_rate
+        )
+        for content_hash in session.exec(select(Article.content_hash)):
+            bloom.add(content_hash)
+
+    _save(bloom)
+    _known = bloom
+    print(f"  Rebuilt known-URL filter from {stored} stored articles")
+    return bloom
+
+
+def reset():
+    """Forget the in-memory filter so the next check reloads it from disk"""
+    global _known
+    _known = None
+
+
+def _get_filter() -> BloomFilter:
+    """Load the filter from disk on first use, rebuilding it if missing or unreadable"""
+    global _known
+    if _known is None:
+        try:
+            _known = BloomFilter.from_bytes(_path().read_bytes())
+        except (OSError, ValueError):
+            return rebuild()
+
+        # A filter left over from another database would hide articles that were never stored
+        if _known.count and not _stored_count():
+            return rebuild()
+    return _known
+
+
+def _stored_count() -> int:
+    """Number of stored articles"""
+    with Session(engine) as session:
+        return session.exec(select(func.count(Article.id))).one()
+
+
+def _save(bloom: BloomFilter):
+    """Write the filter atomically"""
+    path = _path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(bloom.to_bytes())
+    os.replace(tmp_path, path)
+
+
+def _path() -> Path:
+    """Location of the persisted filter"""
+    return Path(settings.cache_dir) / "known_urls.bloom"
@@ -1,18 +1,21 @@
 """FastAPI application with admin endpoints"""
 
 from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from sqlmodel import Session, select
 
+from app import source_health, websub
 from app.config import settings
 from app.database import engine, init_db
 from app.models import Digest, Source
 from app.scheduler import DigestScheduler
+from app.workers import shutdown_executor
 
 # Initialize scheduler
 scheduler = DigestScheduler()
@@ -36,6 +39,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     scheduler.stop()
+    shutdown_executor()
     print("\n✓ Service stopped\n")
 
 
@@ -96,16 +100,17 @@ async def health():
 
 
 @app.post("/run")
-async def run_digest(date: Optional[str] = None):
+async def run_digest(date: Optional[str] = None, replay: bool = False):
     """
     Manually trigger digest generation
 
     Args:
         date: Optional date string (YYYY-MM-DD), defaults to today
+        replay: Rebuild from archived raw payloads instead of fetching, without delivery
     """
     try:
-        print(f"\n[API] Manual digest run triggered (date={date or 'today'})")
-        digest = await scheduler.run_now() if not date else await scheduler.pipeline.run(date)
+        print(f"\n[API] Manual digest run triggered (date={date or 'today'}, replay={replay})")
+        digest = await scheduler.run_now(date, replay=replay)
 
         if digest:
             return {
@@ -122,6 +127,48 @@ async def run_digest(date: Optional[str] = None):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/websub/callback/{subscription_id}/{token}")
+async def websub_verify(subscription_id: int, token: str, request: Request):
+    """
+    WebSub verification of intent
+
+    Args:
+        subscription_id: Subscription ID
+        token: Callback token of the subscription
+    """
+    challenge = websub.verify_intent(subscription_id, token, dict(request.query_params))
+    if challenge is None:
+        raise HTTPException(status_code=404, detail="Unknown subscription or topic")
+
+    return PlainTextResponse(challenge)
+
+
+@app.post("/websub/callback/{subscription_id}/{token}", status_code=202)
+async def websub_receive(
+    subscription_id: int, token: str, request: Request, background_tasks: BackgroundTasks
+):
+    """
+    Receive feed content distributed by a WebSub hub
+
+    Args:
+        subscription_id: Subscription ID
+        token: Callback token of the subscription
+    """
+    subscription = websub.get_subscription(subscription_id, token)
+    if not subscription or subscription.status != "active":
+        raise HTTPException(status_code=410, detail="Subscription not active")
+
+    body = await request.body()
+
+    # Per the spec, content with a bad signature is acknowledged but ignored
+    if websub.verify_signature(subscription.secret, body, request.headers.get("X-Hub-Signature")):
+        background_tasks.add_task(scheduler.pipeline.ingest_pushed, subscription.source_id, body)
+    else:
+        print(f"[WEBSUB] Ignoring unsigned or mis-signed content for {subscription_id}")
+
+    return {"status": "accepted"}
+
+
 @app.get("/latest")
 async def get_latest_digest(format: str = "html"):
     """
@@ -250,6 +297,31 @@ async def list_sources():
         }
 
 
+@app.get("/sources/health")
+async def sources_health():
+    """Fetch health of each source, including ones currently skipped by the circuit breaker"""
+    now = datetime.utcnow()
+    records = source_health.list_health()
+
+    return {
+        "count": len(records),
+        "skipped": sum(1 for h in records if h.open_until and h.open_until > now),
+        "sources": [
+            {
+                "source_id": h.source_id,
+                "consecutive_failures": h.consecutive_failures,
+                "last_error": h.last_error,
+                "last_failure_at": h.last_failure_at.isoformat() if h.last_failure_at else None,
+                "last_success_at": h.last_success_at.isoformat() if h.last_success_at else None,
+                "skipped_until": (
+                    h.open_until.isoformat() if h.open_until and h.open_until > now else None
+                ),
+            }
+            for h in records
+        ],
+    }
+
+
 @app.post("/sources")
 async def create_source(name: str, type: str, config: dict, is_active: bool = True):
     """
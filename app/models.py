@@ -1,10 +1,12 @@
 """Database models"""
 
 import json
+import secrets
 from datetime import datetime
 from enum import Enum
 from typing import Optional
 
+from sqlalchemy import UniqueConstraint
 from sqlmodel import Field, SQLModel
 
 
@@ -58,6 +60,78 @@ class Source(SQLModel, table=True):
         self.config_json = json.dumps(value)
 
 
+class FeedState(SQLModel, table=True):
+    """Conditional-GET validators for a feed URL, shared across runs and processes"""
+
+    __tablename__ = "feed_states"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    url: str = Field(index=True, unique=True)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class SourceState(SQLModel, table=True):
+    """Incremental sync cursor for a source (e.g. the last Gmail historyId)"""
+
+    __tablename__ = "source_states"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    source_id: int = Field(foreign_key="sources.id", index=True, unique=True)
+    cursor: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class SourceHealth(SQLModel, table=True):
+    """Fetch health of a source, used to skip sources that keep failing"""
+
+    __tablename__ = "source_health"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    source_id: int = Field(foreign_key="sources.id", index=True, unique=True)
+    consecutive_failures: int = 0
+    last_error: Optional[str] = None
+    last_failure_at: Optional[datetime] = None
+    last_success_at: Optional[datetime] = None
+    open_until: Optional[datetime] = None  # Source is skipped until then
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class RawPayload(SQLModel, table=True):
+    """Index entry of a raw payload kept in the local archive for replay"""
+
+    __tablename__ = "raw_payloads"
+    __table_args__ = (UniqueConstraint("kind", "locator", "digest"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    source_id: Optional[int] = Field(default=None, foreign_key="sources.id", index=True)
+    kind: str = Field(index=True)  # feed/reuters_api/gmail_message
+    locator: str = Field(index=True)  # Feed URL, API topic or message ID
+    digest: str  # SHA-256 of the payload, names its archive file
+    size: int
+    fetched_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class WebSubSubscription(SQLModel, table=True):
+    """WebSub subscription of an RSS source to the hub its feed advertises"""
+
+    __tablename__ = "websub_subscriptions"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    source_id: int = Field(foreign_key="sources.id", index=True, unique=True)
+    hub_url: str
+    topic_url: str
+    secret: str  # HMAC key the hub signs distributed content with
+    callback_token: str = Field(default_factory=lambda: secrets.token_urlsafe(24))
+    status: str = Field(default="pending", index=True)  # pending/active/denied/unsubscribed
+    requested_mode: Optional[str] = None  # subscribe/unsubscribe sent, awaiting verification
+    lease_seconds: Optional[int] = None
+    expires_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class Article(SQLModel, table=True):
     """News article"""
 
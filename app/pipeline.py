@@ -1,24 +1,35 @@
 """Main digest generation pipeline"""
 
-from datetime import datetime, timedelta
+import asyncio
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
+from urllib.parse import urlparse
 
+import httpx
 import pytz
 from sqlmodel import Session, select
 
+from app import known_urls, source_health
 from app.config import load_sources_config, settings
 from app.database import engine
 from app.delivery import EmailDelivery, TelegramDelivery, WhatsAppDelivery
+from app.http_client import SingleFlight, create_http_client
 from app.models import Article, Digest, Source
 from app.processors import ArticleClassifier, ArticleDeduplicator, ArticleNormalizer, ArticleRanker
+from app.processors.deduplicator import url_hash
 from app.renderer import DigestRenderer
 from app.summarizer import ArticleSummarizer
-from ingestors import GmailIngestor, ReutersIngestor, RSSIngestor
+from ingestors import create_ingestor
 
 
 class DigestPipeline:
     """Main pipeline for generating and delivering daily digest"""
 
+    DIGEST_SIZE = 10  # Articles shown in a digest
+
     def __init__(self):
         self.normalizer = ArticleNormalizer()
         self.classifier = ArticleClassifier()
@@ -30,12 +41,18 @@ class DigestPipeline:
         self.whatsapp_delivery = WhatsAppDelivery()
         self.telegram_delivery = TelegramDelivery()
 
-    async def run(self, date: Optional[str] = None) -> Optional[Digest]:
+    async def run(
+        self, date: Optional[str] = None, ingest: bool = True, replay: bool = False
+    ) -> Optional[Digest]:
         """
         Run the complete digest pipeline
 
         Args:
             date: Date string (YYYY-MM-DD) or None for today
+            ingest: Fetch sources before building the digest; pass False when the
+                background ingestion loop keeps the articles table up to date
+            replay: Rebuild articles from the raw payload archive instead of the
+                network, and skip delivery (for backfills and regenerating past digests)
 
         Returns:
             Generated Digest object or None if failed
@@ -49,6 +66,7 @@ class DigestPipeline:
             digest_date = datetime.now(cairo_tz)
 
         date_str = digest_date.strftime("%Y-%m-%d")
+        since = digest_date - timedelta(hours=24)
 
         print(f"\n{'='*60}")
         print(f"Starting digest generation for {date_str}")
@@ -59,60 +77,71 @@ class DigestPipeline:
             print("Step 1: Loading sources...")
             await self._init_sources()
 
-            # Step 2: Fetch articles
-            print("\nStep 2: Fetching articles...")
-            since = digest_date - timedelta(hours=24)
-            articles = await self._fetch_articles(since)
-            print(f"  Fetched {len(articles)} raw articles")
+            # Step 2: Ingest (skipped when background ingestion already did it)
+            if replay:
+                print("\nStep 2: Replaying archived payloads...")
+                await self.replay(since, digest_date)
+            elif ingest:
+                print("\nStep 2: Ingesting articles...")
+                await self.ingest(since)
+            else:
+                print("\nStep 2: Ingestion handled in the background, skipping fetch")
+
+            # Step 3: Load the 24h window from the database
+            print("\nStep 3: Loading articles from database...")
+            articles = await self._load_articles(since, digest_date)
+            print(f"  Loaded {len(articles)} articles")
 
             if not articles:
                 print("  No articles found, creating empty digest")
-                return await self._create_empty_digest(date_str)
-
-            # Step 3: Normalize
-            print("\nStep 3: Normalizing articles...")
-            articles = await self.normalizer.normalize_batch(articles)
-            print(f"  Normalized {len(articles)} articles")
+                return await self._create_empty_digest(date_str, deliver=not replay)
 
-            # Step 4: Classify
-            print("\nStep 4: Classifying articles...")
-            articles = self.classifier.classify_batch(articles)
-            print(f"  Classified {len(articles)} articles")
-
-            # Step 5: Deduplicate
-            print("\nStep 5: Deduplicating articles...")
+            # Step 4: Deduplicate across ingestion passes
+            print("\nStep 4: Deduplicating articles...")
             articles = self.deduplicator.deduplicate(articles)
             print(f"  Remaining after deduplication: {len(articles)} articles")
 
-            # Step 6: Save to database
-            print("\nStep 6: Saving articles to database...")
-            await self._save_articles(articles)
-
-            # Step 7: Rank articles
-            print("\nStep 7: Ranking articles...")
+            # Step 5: Pre-rank on local features (ranking never looks at URLs)
+            print("\nStep 5: Ranking articles...")
             source_map = await self._get_source_map()
             articles = self.ranker.rank(articles, source_map)
-            top_articles = self.ranker.top_k(articles, k=10)
+            candidates = self.ranker.top_k(
+                articles, k=math.ceil(self.DIGEST_SIZE * settings.canonical_candidate_factor)
+            )
+
+            # Step 6: Resolve canonical URLs of the candidates only, then settle the top K
+            if replay:
+                print("\nStep 6: Replay run, keeping rule-based URLs")
+            else:
+                print(f"\nStep 6: Resolving canonical URLs of {len(candidates)} candidates...")
+                await self._resolve_candidate_urls(candidates)
+            candidates = self.deduplicator.deduplicate(candidates)
+            top_articles = self.ranker.top_k(
+                self.ranker.rank(candidates, source_map), k=self.DIGEST_SIZE
+            )
             print(f"  Top {len(top_articles)} articles selected")
 
-            # Step 8: Generate summary
-            print("\nStep 8: Generating AI summary...")
+            # Step 7: Generate summary
+            print("\nStep 7: Generating AI summary...")
             summary = await self.summarizer.summarize(top_articles, date_str)
             print(f"  TL;DR: {summary['tl_dr'][:100]}...")
 
-            # Step 9: Render digest
-            print("\nStep 9: Rendering digest...")
+            # Step 8: Render digest
+            print("\nStep 8: Rendering digest...")
             paths = self.renderer.render(summary, date_str)
             print(f"  HTML: {paths['html_path']}")
             print(f"  Markdown: {paths['md_path']}")
 
-            # Step 10: Save digest to database
-            print("\nStep 10: Saving digest to database...")
+            # Step 9: Save digest to database
+            print("\nStep 9: Saving digest to database...")
             digest = await self._save_digest(date_str, summary, paths, top_articles)
 
-            # Step 11: Deliver
-            print("\nStep 11: Delivering digest...")
-            await self._deliver_digest(date_str, summary, paths, top_articles)
+            # Step 10: Deliver
+            if replay:
+                print("\nStep 10: Replay run, skipping delivery")
+            else:
+                print("\nStep 10: Delivering digest...")
+                await self._deliver_digest(date_str, summary, paths, top_articles)
 
             print(f"\n{'='*60}")
             print(f"✓ Digest generation complete for {date_str}")
@@ -127,6 +156,135 @@ class DigestPipeline:
             traceback.print_exc()
             return None
 
+    async def ingest(self, since: datetime, sources: Optional[List[Source]] = None) -> int:
+        """
+        Fetch, normalize, classify and deduplicate articles, storing the new ones
+
+        Args:
+            since: Fetch articles published after this datetime
+            sources: Sources to fetch, or None for all active sources
+
+        Returns:
+            Number of new articles stored
+        """
+        # One pooled client for every network call of the fetch step
+        async with create_http_client() as client:
+            articles = await self._fetch_articles(since, client, sources)
+            print(f"  Fetched {len(articles)} raw articles")
+
+        return await self._process_articles(articles)
+
+    async def ingest_pushed(self, source_id: int, body: bytes) -> int:
+        """
+        Ingest a feed document pushed by a WebSub hub for an RSS source
+
+        Args:
+            source_id: Source the subscription belongs to
+            body: Feed content delivered by the hub
+
+        Returns:
+            Number of new articles stored
+        """
+        with Session(engine) as session:
+            source = session.get(Source, source_id)
+        if not source or not source.is_active:
+            return 0
+
+        since = datetime.now(timezone.utc) - timedelta(hours=settings.ingest_lookback_hours)
+        articles = await create_ingestor(source).receive_pushed(body, since)
+        print(f"  Received {len(articles)} pushed articles for {source.name}")
+
+        return await self._process_articles(articles)
+
+    async def replay(self, since: datetime, until: datetime) -> int:
+        """
+        Rebuild articles for a time window from the raw payload archive, without network access
+
+        Args:
+            since: Start of the article window
+            until: End of the article window
+
+        Returns:
+            Number of new articles stored
+        """
+        # Entries of the window keep showing up in payloads fetched up to a lookback later
+        end = until.astimezone(timezone.utc).replace(tzinfo=None) + timedelta(
+            hours=settings.ingest_lookback_hours
+        )
+
+        with Session(engine) as session:
+            sources = session.exec(select(Source).where(Source.is_active == True)).all()
+
+        results = await asyncio.gather(
+            *(self._replay_source(source, since, end) for source in sources)
+        )
+        articles = [article for source_articles in results for article in source_articles]
+
+        return await self._process_articles(articles)
+
+    async def _replay_source(
+        self, source: Source, since: datetime, until: datetime
+    ) -> List[Article]:
+        """Rebuild the articles of a single source from the archive, reporting errors"""
+        try:
+            ingestor = create_ingestor(source)
+            if ingestor is None:
+                print(f"  {source.name}: unknown source type {source.type}")
+                return []
+
+            source_articles = await ingestor.replay_articles(since, until)
+            print(f"  {source.name} ({source.type}): {len(source_articles)} archived articles")
+            return source_articles
+
+        except Exception as e:
+            print(f"  {source.name} ({source.type}): replay error: {e}")
+            return []
+
+    async def _process_articles(self, articles: List[Article]) -> int:
+        """
+        Normalize, classify and deduplicate fetched articles, then store the new ones
+
+        Only local work happens here; canonical URLs are resolved over the network when a
+        digest is built, and only for its top candidates.
+        """
+        if not articles:
+            return 0
+
+        # URLs as found in the sources, remembered so later polls skip these entries early
+        source_keys = [url_hash(article.url) for article in articles if article.url]
+
+        articles = await self.normalizer.normalize_batch(articles)
+        print(f"  Normalized {len(articles)} articles")
+
+        articles = self.classifier.classify_batch(articles)
+        articles = self.deduplicator.deduplicate(articles)
+        print(f"  Classified and deduplicated: {len(articles)} articles")
+
+        saved = await self._save_articles(articles)
+        known_urls.remember(source_keys + [article.content_hash for article in articles])
+        return saved
+
+    async def _resolve_candidate_urls(self, candidates: List[Article]):
+        """Resolve canonical URLs of digest candidates and store the ones that changed"""
+        original_urls = [article.url for article in candidates]
+
+        async with create_http_client() as client:
+            await self.normalizer.resolve_canonical_urls(candidates, client=client)
+
+        # Keep content_hash as stored: ingestion dedupes new entries against it
+        changed = {
+            article.id: article.url
+            for article, url in zip(candidates, original_urls)
+            if article.url != url and article.id is not None
+        }
+        if changed:
+            with Session(engine) as session:
+                for article in session.exec(select(Article).where(Article.id.in_(changed))):
+                    article.url = changed[article.id]
+                    session.add(article)
+                session.commit()
+        print(f"  {len(changed)} of {len(candidates)} URLs changed")
+
     async def _init_sources(self):
         """Initialize sources from YAML config if not already in database"""
         with Session(engine) as session:
@@ -153,54 +311,167 @@ class DigestPipeline:
             session.commit()
             print(f"  Initialized {len(sources)} sources from config")
 
-    async def _fetch_articles(self, since: datetime) -> List[Article]:
-        """Fetch articles from all active sources"""
-        articles = []
+    async def _fetch_articles(
+        self,
+        since: datetime,
+        client: Optional[httpx.AsyncClient] = None,
+        sources: Optional[List[Source]] = None,
+    ) -> List[Article]:
+        """Fetch articles from the given (default: all active) sources concurrently"""
+        if sources is None:
+            with Session(engine) as session:
+                sources = session.exec(select(Source).where(Source.is_active == True)).all()
+
+        # Global cap plus a per-host cap so one publisher never sees a burst of requests
+        global_limit = asyncio.Semaphore(settings.fetch_concurrency)
+        host_limits = defaultdict(lambda: asyncio.Semaphore(settings.fetch_per_host_concurrency))
+
+        # Sources sharing a feed URL download and parse it once per run
+        flights = SingleFlight()
+
+        # Skip sources that failed repeatedly until their backoff expires
+        skipped = source_health.open_circuits(source.id for source in sources)
+        for source in sources:
+            if source.id in skipped:
+                health = skipped[source.id]
+                print(
+                    f"  {source.name} ({source.type}): skipped after "
+                    f"{health.consecutive_failures} failures until {health.open_until:%H:%M} UTC "
+                    f"({health.last_error})"
+                )
+        sources = [source for source in sources if source.id not in skipped]
 
-        with Session(engine) as session:
-            sources = session.exec(select(Source).where(Source.is_active == True)).all()
+        # The whole stage shares one budget; queued sources get whatever is left of it
+        started = time.monotonic()
+        deadline = started + settings.fetch_run_budget_seconds
+
+        async def fetch_one(source: Source) -> List[Article]:
+            # Wait for the host first, so sources queued behind a busy host hold no global slot
+            async with host_limits[self._source_host(source)], global_limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"  {source.name} ({source.type}): skipped, fetch budget exhausted")
+                    return []
+                return await self._fetch_source(source, since, client, flights, remaining)
 
-            for source in sources:
-                try:
-                    print(f"  Fetching from {source.name} ({source.type})...")
-
-                    # Create appropriate ingestor
-                    if source.type == "gmail":
-                        ingestor = GmailIngestor(source.id, source.config)
-                    elif source.type == "rss":
-                        ingestor = RSSIngestor(source.id, source.config)
-                    elif source.type == "reuters":
-                        ingestor = ReutersIngestor(source.id, source.config)
-                    else:
-                        print(f"    Unknown source type: {source.type}")
-                        continue
-
-                    # Fetch articles
-                    source_articles = await ingestor.fetch_articles(since)
-                    print(f"    Got {len(source_articles)} articles")
-                    articles.extend(source_articles)
-
-                except Exception as e:
-                    print(f"    Error fetching from {source.name}: {e}")
-                    continue
+        results = await asyncio.gather(*(fetch_one(source) for source in sources))
+        print(f"  Fetched {len(sources)} sources in {time.monotonic() - started:.1f}s")
+
+        articles = []
+        for source_articles in results:
+            articles.extend(source_articles)
 
         return articles
 
-    async def _save_articles(self, articles: List[Article]):
-        """Save articles to database"""
+    async def _fetch_source(
+        self,
+        source: Source,
+        since: datetime,
+        client: Optional[httpx.AsyncClient] = None,
+        flights: Optional[SingleFlight] = None,
+        budget: Optional[float] = None,
+    ) -> List[Article]:
+        """Fetch articles from a single source, reporting its own errors, timing and health"""
+        timeout = settings.fetch_source_timeout_seconds
+        if budget is not None:
+            timeout = min(timeout, budget)
+
+        started = time.monotonic()
+        try:
+            # Create the ingestor registered for this source type
+            ingestor = create_ingestor(source, client=client, flights=flights)
+            if ingestor is None:
+                print(f"  {source.name}: unknown source type {source.type}")
+                return []
+
+            source_articles = await asyncio.wait_for(ingestor.fetch_articles(since), timeout)
+
+        except asyncio.TimeoutError:
+            # Running out of the stage budget is not the source's fault
+            if timeout < settings.fetch_source_timeout_seconds:
+                print(f"  {source.name} ({source.type}): cut off by the fetch budget")
+            else:
+                self._record_source_failure(source, f"timed out after {timeout:.0f}s")
+            return []
+
+        except Exception as e:
+            elapsed = time.monotonic() - started
+            self._record_source_failure(source, f"error after {elapsed:.1f}s: {e}")
+            return []
+
+        elapsed = time.monotonic() - started
+        print(
+            f"  {source.name} ({source.type}): "
+            f"{len(source_articles)} articles in {elapsed:.1f}s"
+        )
+
+        # Errors the ingestor handled itself only count when they left it with nothing
+        if ingestor.errors and not source_articles:
+            self._record_source_failure(source, ingestor.errors[-1])
+        else:
+            source_health.record_success(source.id)
+
+        return source_articles
+
+    @staticmethod
+    def _record_source_failure(source: Source, error: str):
+        """Report a failed source and count it towards its circuit breaker"""
+        print(f"  {source.name} ({source.type}): {error}")
+        open_until = source_health.record_failure(source.id, error)
+        if open_until:
+            print(f"  {source.name} ({source.type}): circuit open until {open_until:%H:%M} UTC")
+
+    @staticmethod
+    def _source_host(source: Source) -> str:
+        """Host a source fetches from, used to cap concurrent requests per publisher"""
+        if source.type == "rss":
+            return urlparse(source.config.get("url", "")).netloc.lower()
+        return source.type
+
+    async def _save_articles(self, articles: List[Article]) -> int:
+        """Save articles whose content hash is not stored yet, returning how many"""
+        hashes = [article.content_hash for article in articles]
+
+        # Check and insert without awaiting in between, so concurrent ingests cannot interleave
         with Session(engine) as session:
-            for article in articles:
+            existing = set()
+            for i in range(0, len(hashes), 500):
+                existing.update(
+                    session.exec(
+                        select(Article.content_hash).where(
+                            Article.content_hash.in_(hashes[i : i + 500])
+                        )
+                    ).all()
+                )
+
+            new_articles = [article for article in articles if article.content_hash not in existing]
+            for article in new_articles:
                 session.add(article)
             session.commit()
-        print(f"  Saved {len(articles)} articles")
+
+        print(f"  Saved {len(new_articles)} new articles")
+        return len(new_articles)
+
+    async def _load_articles(self, since: datetime, until: datetime) -> List[Article]:
+        """Load stored articles published within [since, until]"""
+        # published_at is stored as naive UTC
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        until = until.astimezone(timezone.utc).replace(tzinfo=None)
+
+        with Session(engine) as session:
+            return list(
+                session.exec(
+                    select(Article)
+                    .where(Article.published_at >= since, Article.published_at <= until)
+                    .order_by(Article.published_at.desc())
+                ).all()
+            )
 
     async def _get_source_map(self) -> dict:
         """Get source ID to info mapping"""
         with Session(engine) as session:
             sources = session.exec(select(Source)).all()
-            return {
-                source.id: {"name": source.name, "type": source.type} for source in sources
-            }
+            return {source.id: {"name": source.name, "type": source.type} for source in sources}
 
     async def _save_digest(
         self, date_str: str, summary: dict, paths: dict, articles: List[Article]
@@ -272,8 +543,8 @@ class DigestPipeline:
             else:
                 print("    ✗ Telegram failed")
 
-    async def _create_empty_digest(self, date_str: str) -> Digest:
-        """Create empty digest when no articles found"""
+    async def _create_empty_digest(self, date_str: str, deliver: bool = True) -> Digest:
+        """Create empty digest when no articles found (delivered unless deliver is False)"""
         summary = {
             "tl_dr": "No major updates today.",
             "sections": {},
@@ -281,6 +552,7 @@ class DigestPipeline:
 
         paths = self.renderer.render(summary, date_str)
         digest = await self._save_digest(date_str, summary, paths, [])
-        await self._deliver_digest(date_str, summary, paths, [])
+        if deliver:
+            await self._deliver_digest(date_str, summary, paths, [])
 
         return digest
@@ -0,0 +1,142 @@
+"""Rule-based URL canonicalization (no network access)"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import yaml
+
+from app.config import settings
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+MOBILE_PREFIXES = ("m.", "mobile.", "amp.")
+AMP_PARAMS = {("output", "amp"), ("outputtype", "amp"), ("amp", ""), ("amp", "1")}
+INDEX_PAGE = re.compile(r"/(index\.html?|index\.php|default\.aspx)$", re.IGNORECASE)
+AMP_PATH_SEGMENT = re.compile(r"/amp(?=/|$)", re.IGNORECASE)
+AMP_EXTENSION = re.compile(r"\.amp(?=\.html?$)", re.IGNORECASE)
+
+
+class CanonicalUrl(NamedTuple):
+    """Result of rule-based canonicalization"""
+
+    url: str
+    resolve: bool  # Whether the page should still be fetched to find its canonical link
+
+
+class UrlCanonicalizer:
+    """Canonicalizes URLs with general rules plus a per-domain rules table"""
+
+    def __init__(self, rules: Optional[dict] = None):
+        if rules is None:
+            rules = load_canonical_rules()
+
+        # Changes whenever the rules do, for caches of canonicalized URLs
+        self.version = hashlib.sha256(
+            json.dumps(rules, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+
+        self.tracking_params = {p.lower() for p in rules.get("tracking_params", [])}
+        self.tracking_prefixes = tuple(p.lower() for p in rules.get("tracking_prefixes", []))
+        self.defaults = {
+            "strip_amp": True,
+            "strip_mobile": True,
+            "strip_index": True,
+            "drop_params": [],
+            "keep_params": None,
+            "resolve": True,
+            "desktop_host": None,
+            **(rules.get("defaults") or {}),
+        }
+        self.domains = {
+            domain.lower(): domain_rules or {}
+            for domain, domain_rules in (rules.get("domains") or {}).items()
+        }
+
+    def canonicalize(self, url: str) -> CanonicalUrl:
+        """
+        Canonicalize a URL using the rules only
+
+        Args:
+            url: Absolute URL
+
+        Returns:
+            Canonical URL, and whether the rules leave the decision to a page fetch
+        """
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+
+        # Pseudo-URLs (e.g. gmail:) are identifiers, not pages
+        if scheme not in DEFAULT_PORTS:
+            return CanonicalUrl(url, False)
+
+        host = (parts.hostname or "").rstrip(".")
+        rules = self._rules_for(host)
+
+        if rules["strip_mobile"]:
+            host = self._desktop_host(host, rules)
+
+        netloc = host
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+        if port and port != DEFAULT_PORTS[scheme]:
+            netloc = f"{host}:{port}"
+
+        path = parts.path or "/"
+        if rules["strip_amp"]:
+            path = AMP_EXTENSION.sub("", AMP_PATH_SEGMENT.sub("", path)) or "/"
+        if rules["strip_index"]:
+            path = INDEX_PAGE.sub("/", path)
+
+        query = urlencode(sorted(self._clean_params(parts.query, rules)))
+
+        return CanonicalUrl(urlunsplit((scheme, netloc, path, query, "")), rules["resolve"])
+
+    def _rules_for(self, host: str) -> dict:
+        """Merged defaults and rules of the most specific domain entry matching a host"""
+        labels = host.split(".")
+        for i in range(len(labels) - 1):
+            domain_rules = self.domains.get(".".join(labels[i:]))
+            if domain_rules is not None:
+                return {**self.defaults, **domain_rules}
+        return self.defaults
+
+    def _desktop_host(self, host: str, rules: dict) -> str:
+        """Map a mobile or AMP subdomain to the publisher's main host"""
+        for prefix in MOBILE_PREFIXES:
+            if host.startswith(prefix) and host.count(".") >= 2:
+                return rules["desktop_host"] or host[len(prefix) :]
+        return host
+
+    def _clean_params(self, query: str, rules: dict) -> List[tuple]:
+        """Query parameters left after removing tracking, AMP and per-domain parameters"""
+        drop = {p.lower() for p in rules["drop_params"]}
+        keep = rules["keep_params"]
+        keep = None if keep is None else {p.lower() for p in keep}
+
+        params = []
+        for key, value in parse_qsl(query, keep_blank_values=True):
+            name = key.lower()
+            if name in self.tracking_params or name.startswith(self.tracking_prefixes):
+                continue
+            if rules["strip_amp"] and (name, value.lower()) in AMP_PARAMS:
+                continue
+            if name in drop or (keep is not None and name not in keep):
+                continue
+            params.append((key, value))
+
+        return params
+
+
+def load_canonical_rules() -> dict:
+    """Load canonicalization rules from the YAML file configured in settings"""
+    path = Path(settings.canonical_rules_path)
+    if not path.exists():
+        return {}
+
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
@@ -1,126 +1,128 @@
 """Article classification for regions and sections"""
 
+import os
 import re
-from typing import List
+from typing import List, Optional
 
+from app.cache import DiskCache, content_key
+from app.config import settings
 from app.models import Article, RegionTag, SectionTag
 
+from .keywords import KeywordHits, KeywordTables, article_text, get_keyword_tables
+from .text_model import TextModel, get_text_model
+
 
 class ArticleClassifier:
-    """Classifies articles by region and section"""
-
-    # Region keywords
-    REGION_KEYWORDS = {
-        RegionTag.EGYPT: [
-            "egypt",
-            "egyptian",
-            "cairo",
-            "suez",
-            "alexandria",
-            "nile",
-            "pharaoh",
-            "cbe",
-            "central bank of egypt",
-        ],
-        RegionTag.KSA: [
-            "saudi",
-            "arabia",
-            "riyadh",
-            "jeddah",
-            "mecca",
-            "kingdom",
-            "ksa",
-            "saudi aramco",
-            "neom",
-        ],
-        RegionTag.UAE: [
-            "uae",
-            "dubai",
-            "abu dhabi",
-            "emirates",
-            "emirati",
-            "sharjah",
-            "dp world",
-        ],
-        RegionTag.MENA: [
-            "middle east",
-            "north africa",
-            "mena",
-            "gulf",
-            "gcc",
-            "arab",
-            "levant",
-        ],
-    }
-
-    # Section keywords
-    SECTION_KEYWORDS = {
-        SectionTag.LOGISTICS_SHIPPING: [
-            "shipping",
-            "logistics",
-            "port",
-            "cargo",
-            "freight",
-            "maritime",
-            "vessel",
-            "container",
-            "suez canal",
-            "supply chain",
-            "warehouse",
-            "transport",
-            "delivery",
-        ],
-        SectionTag.POLICY_REGULATION: [
-            "policy",
-            "regulation",
-            "law",
-            "government",
-            "ministry",
-            "parliament",
-            "legislation",
-            "compliance",
-            "tax",
-            "subsidy",
-            "reform",
-            "central bank",
-            "monetary",
-            "fiscal",
-        ],
-    }
-
-    def classify(self, article: Article) -> Article:
+    """
+    Classifies articles by region and section
+
+    Batches use the trained text model when one is available (see text_model.py), and
+    keywords otherwise.
+    """
+
+    def __init__(self):
+        # Tags of already classified texts, shared on disk by all runs and worker processes
+        self.processing_cache = DiskCache(
+            os.path.join(settings.cache_dir, "processed", "classify"),
+            settings.processing_cache_max_bytes // 2,
+        )
+
+    def classify(self, article: Article, tables: Optional[KeywordTables] = None) -> Article:
         """
         Classify article by region and section
 
         Args:
             article: Article to classify
+            tables: Keyword tables to use (defaults to the current ones from keywords.yaml)
 
         Returns:
             Article with tags set
         """
+        tables = tables or get_keyword_tables()
+
+        # One scan of title and summary finds region and section keywords together
+        hits = tables.engine.scan(article_text(article.title, article.summary_raw))
+
         # Classify region
-        article.region_tag = self._classify_region(article)
+        article.region_tag = self._classify_region(hits)
 
         # Classify section
-        article.section_tag = self._classify_section(article)
+        article.section_tag = self._classify_section(hits)
 
         return article
 
     def classify_batch(self, articles: List[Article]) -> List[Article]:
-        """Classify a batch of articles"""
-        return [self.classify(article) for article in articles]
-
-    def _classify_region(self, article: Article) -> str:
-        """Classify article region based on keywords"""
-        # Combine title and summary for classification
-        text = f"{article.title} {article.summary_raw or ''}".lower()
+        """
+        Classify a batch of articles
 
-        # Score each region
-        scores = {}
-        for region, keywords in self.REGION_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword.lower() in text)
-            if score > 0:
-                scores[region] = score
+        Articles whose title and summary were classified before with the same keyword
+        tables and model take their tags from the processing cache.
+        """
+        tables = get_keyword_tables()
+        model = get_text_model()
+
+        keys = [self._processing_key(article, tables, model) for article in articles]
+        entries = [self.processing_cache.get(key) if key else None for key in keys]
+
+        misses = [article for article, entry in zip(articles, entries) if entry is None]
+        self._classify_uncached(misses, tables, model)
+
+        for article, key, entry in zip(articles, keys, entries):
+            if entry is not None:
+                article.region_tag, article.section_tag = entry["region"], entry["section"]
+            elif key:
+                self.processing_cache.set(
+                    key, {"region": article.region_tag, "section": article.section_tag}
+                )
+
+        return articles
+
+    def _classify_uncached(
+        self, articles: List[Article], tables: KeywordTables, model: Optional[TextModel]
+    ):
+        """Classify articles with the model where it is sure, and keywords otherwise"""
+        if not articles:
+            return
+
+        if model is None:
+            for article in articles:
+                self.classify(article, tables)
+            return
+
+        # One vectorized pass over the batch; keywords fill in what the model is unsure of
+        predictions = model.predict(
+            [article_text(article.title, article.summary_raw) for article in articles],
+            settings.classifier_min_confidence,
+        )
+        regions = predictions.get("region") or [None] * len(articles)
+        sections = predictions.get("section") or [None] * len(articles)
+
+        for article, region, section in zip(articles, regions, sections):
+            if region is None or section is None:
+                self.classify(article, tables)
+            if region is not None:
+                article.region_tag = region
+            if section is not None:
+                article.section_tag = section
+
+    def _processing_key(
+        self, article: Article, tables: KeywordTables, model: Optional[TextModel]
+    ) -> Optional[str]:
+        """Processing cache key of an article's text (None if the cache is off)"""
+        if not settings.processing_cache_enabled:
+            return None
+        model_version = f"{model.version}:{settings.classifier_min_confidence}" if model else ""
+        return content_key(
+            "classify",
+            f"{tables.version}:{model_version}",
+            article.title,
+            article.summary_raw,
+        )
+
+    def _classify_region(self, hits: KeywordHits) -> str:
+        """Classify article region based on keyword hits"""
+        # Score each region by the number of distinct keywords found
+        scores = {region: len(keywords) for region, keywords in hits["region"].items()}
 
         # Return region with highest score, or MENA as default
         if scores:
@@ -129,17 +131,10 @@ class ArticleClassifier:
         # Default to MENA
         return RegionTag.MENA.value
 
-    def _classify_section(self, article: Article) -> str:
-        """Classify article section based on keywords"""
-        # Combine title and summary for classification
-        text = f"{article.title} {article.summary_raw or ''}".lower()
-
-        # Score each section
-        scores = {}
-        for section, keywords in self.SECTION_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword.lower() in text)
-            if score > 0:
-                scores[section] = score
+    def _classify_section(self, hits: KeywordHits) -> str:
+        """Classify article section based on keyword hits"""
+        # Score each section by the number of distinct keywords found
+        scores = {section: len(keywords) for section, keywords in hits["section"].items()}
 
         # Return section with highest score, or GENERAL as default
         if scores:
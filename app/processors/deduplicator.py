@@ -7,6 +7,27 @@ from urllib.parse import urlparse
 from app.models import Article
 
 
+def url_hash(url: str) -> str:
+    """
+    Hash a URL for deduplication, ignoring query string, fragment and trailing slashes
+
+    Args:
+        url: Article URL
+
+    Returns:
+        Short hex digest, used as the content hash of articles with a web URL
+    """
+    parsed = urlparse(url)
+
+    # Create normalized form: scheme://domain/path (ignore query, fragment)
+    normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+
+    # Remove trailing slashes
+    normalized = normalized.rstrip("/")
+
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
 class ArticleDeduplicator:
     """Deduplicates articles based on URL and content similarity"""
 
@@ -62,16 +83,7 @@ class ArticleDeduplicator:
 
     def _hash_url(self, url: str) -> str:
         """Hash URL for deduplication"""
-        # Normalize URL for hashing
-        parsed = urlparse(url)
-
-        # Create normalized form: scheme://domain/path (ignore query, fragment)
-        normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-
-        # Remove trailing slashes
-        normalized = normalized.rstrip("/")
-
-        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+        return url_hash(url)
 
     def _extract_domain(self, url: str) -> str:
         """Extract domain from URL"""
@@ -0,0 +1,229 @@
+"""Keyword tables and multi-pattern matching shared by the classifier and ranker"""
+
+import hashlib
+import re
+import threading
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+import yaml
+
+from app.config import settings
+from app.models import RegionTag, SectionTag
+
+TOKEN = re.compile(r"\w+")
+
+# group -> label -> keywords of that label found in the text
+KeywordHits = Dict[str, Dict[Hashable, Set[str]]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN.findall(text.lower())
+
+
+def match_form(token: str) -> str:
+    """Form a token is matched in, with a plural "s" removed ("ports" and "port" both match)"""
+    return token[:-1] if len(token) > 3 and token.endswith("s") else token
+
+
+class KeywordEngine:
+    """
+    Aho-Corasick automaton over word tokens
+
+    Keywords (single words or phrases) are compiled into one trie with failure links, so a
+    text is scanned once, token by token, whatever the number of keywords. Matching works
+    on whole words, and a trailing "s" on a text word is allowed (so "ports" matches
+    "port"), but "report" never matches "port". Keyword and text words both go through
+    match_form(), so overlapping keywords such as "port" and "ports authority" are all found.
+    """
+
+    def __init__(self, groups: Mapping[str, Mapping[Hashable, Iterable[str]]]):
+        """
+        Compile keyword tables
+
+        Args:
+            groups: Group name (e.g. "region") -> label (e.g. a RegionTag) -> keywords
+        """
+        self.groups = list(groups)
+        self._children: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[str, Hashable, str]]] = [[]]
+
+        for group, table in groups.items():
+            for label, keywords in table.items():
+                for keyword in keywords:
+                    tokens = [match_form(token) for token in tokenize(keyword)]
+                    if tokens:
+                        self._add(tokens, (group, label, keyword))
+
+        self._link()
+        self.scan = lru_cache(maxsize=4096)(self._scan)
+
+    def _scan(self, text: str) -> KeywordHits:
+        """
+        Find every keyword occurring in a text
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Dict of group -> label -> matched keywords (labels without hits are omitted)
+        """
+        hits: KeywordHits = {group: {} for group in self.groups}
+        root = self._children[0]
+        outputs = self._outputs
+        node = 0
+        for token in tokenize(text):
+            token = match_form(token)
+            # Most words start no keyword; skip them without leaving the root
+            if node == 0 and token not in root:
+                continue
+            node = self._step(node, token)
+            for group, label, keyword in outputs[node]:
+                hits[group].setdefault(label, set()).add(keyword)
+        return hits
+
+    def _step(self, node: int, token: str) -> int:
+        """Follow the transition for a token, falling back along failure links"""
+        while True:
+            child = self._children[node].get(token)
+            if child is not None:
+                return child
+            if node == 0:
+                return 0
+            node = self._fail[node]
+
+    def _add(self, tokens: List[str], output: Tuple[str, Hashable, str]):
+        """Insert a keyword's tokens into the trie"""
+        node = 0
+        for token in tokens:
+            child = self._children[node].get(token)
+            if child is None:
+                child = len(self._children)
+                self._children[node][token] = child
+                self._children.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = child
+        self._outputs[node].append(output)
+
+    def _link(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self._children[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._children[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._children[fail]:
+                    fail = self._fail[fail]
+                target = self._children[fail].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+
+class KeywordTables(NamedTuple):
+    """Compiled keyword and weight tables (replaced as a whole on reload)"""
+
+    engine: KeywordEngine  # Groups "region", "section" and "boost"
+    keyword_boosts: Dict[str, float]
+    source_weights: Dict[str, float]
+    version: str  # Hash of the file the tables were loaded from
+
+
+_tables: Optional[KeywordTables] = None
+_loaded_stamp: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the loaded file
+_reload_lock = threading.Lock()
+
+
+def get_keyword_tables() -> KeywordTables:
+    """
+    Get the current keyword tables, reloading them if the YAML file changed
+
+    Callers should hold on to the returned tables for a whole batch so every article in
+    it is scored against the same version.
+    """
+    global _tables, _loaded_stamp
+
+    path = Path(settings.keywords_path)
+    try:
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stamp = None
+
+    if _tables is not None and stamp == _loaded_stamp:
+        return _tables
+
+    with _reload_lock:
+        if _tables is None or stamp != _loaded_stamp:
+            try:
+                tables = load_keyword_tables(path)
+                print(f"Loaded keyword tables from {path} (version {tables.version})")
+            except (OSError, yaml.YAMLError, ValueError, TypeError, AttributeError) as e:
+                print(f"Error loading keyword tables from {path}: {e}")
+                tables = _tables or compile_keyword_tables({})
+
+            # Readers see either the old tables or the new ones, never a mix
+            _tables, _loaded_stamp = tables, stamp
+
+    return _tables
+
+
+def load_keyword_tables(path: Path) -> KeywordTables:
+    """
+    Load and compile keyword tables from a YAML file
+
+    Raises:
+        OSError, yaml.YAMLError: If the file cannot be read or parsed
+        ValueError: If the file names an unknown region or section tag
+    """
+    if not path.exists():
+        print(f"Keyword tables not found at {path}; classification and ranking use defaults")
+        return compile_keyword_tables({})
+
+    data = path.read_bytes()
+    return compile_keyword_tables(yaml.safe_load(data) or {}, hashlib.sha256(data).hexdigest()[:16])
+
+
+def compile_keyword_tables(config: dict, version: str = "empty") -> KeywordTables:
+    """
+    Compile parsed keyword tables into a matcher
+
+    Args:
+        config: Mapping with "regions", "sections", "keyword_boosts" and "source_weights"
+        version: Identifier of the configuration
+
+    Returns:
+        Compiled tables
+    """
+    regions = {
+        RegionTag(tag): keywords or [] for tag, keywords in (config.get("regions") or {}).items()
+    }
+    sections = {
+        SectionTag(tag): keywords or [] for tag, keywords in (config.get("sections") or {}).items()
+    }
+    boosts = {
+        keyword.lower(): float(boost)
+        for keyword, boost in (config.get("keyword_boosts") or {}).items()
+    }
+    source_weights = {
+        name.lower(): float(weight) for name, weight in (config.get("source_weights") or {}).items()
+    }
+
+    engine = KeywordEngine(
+        {
+            "region": regions,
+            "section": sections,
+            "boost": {keyword: [keyword] for keyword in boosts},
+        }
+    )
+    return KeywordTables(engine, boosts, source_weights, version)
+
+
+def article_text(title: Optional[str], summary: Optional[str]) -> str:
+    """Text of an article that keywords are matched against"""
+    return f"{title} {summary or ''}"
@@ -1,24 +1,50 @@
 """Article normalization"""
 
-import re
-from typing import List
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 from urllib.parse import urljoin, urlparse
 
 import httpx
 from bs4 import BeautifulSoup
 
+from app.cache import DiskCache, content_key
+from app.config import settings
+from app.http_client import shared_client
 from app.models import Article
 
+from .canonicalizer import UrlCanonicalizer
+from .text_cleaner import clean_batch, clean_text, clean_title
+
+HEAD_END = b"</head"
+NORMALIZE_VERSION = "2"  # Bump when cleaning changes, to invalidate cached results
+
 
 class ArticleNormalizer:
     """Normalizes article data"""
 
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.timeout = 10.0
+        self.client = client  # Shared pipeline client; a temporary one is used if None
+        self.canonicalizer = UrlCanonicalizer()
+        # Resolved canonical URLs, shared on disk by all runs and worker processes
+        self.canonical_cache = DiskCache(
+            os.path.join(settings.cache_dir, "canonical"), settings.canonical_cache_max_bytes
+        )
+        # Results of local normalization, keyed by the raw fields they were derived from
+        self.processing_cache = DiskCache(
+            os.path.join(settings.cache_dir, "processed", "normalize"),
+            settings.processing_cache_max_bytes // 2,
+        )
+        # Politeness for canonical lookups, shared by every batch this normalizer runs
+        self._lookup_limit = asyncio.Semaphore(settings.normalize_concurrency)
+        self._next_domain_slot: Dict[str, float] = {}
 
     async def normalize(self, article: Article) -> Article:
         """
-        Normalize article data
+        Normalize article data (local work only; see resolve_canonical_urls)
 
         Args:
             article: Article to normalize
@@ -29,8 +55,11 @@ class ArticleNormalizer:
         # Clean title
         article.title = self._clean_title(article.title)
 
-        # Normalize URL
-        article.url = await self._normalize_url(article.url)
+        # Store publication time as naive UTC so time-window queries compare correctly
+        article.published_at = self._normalize_date(article.published_at)
+
+        # Normalize URL with the offline rules
+        article.url = self._normalize_url(article.url)
 
         # Clean summary
         if article.summary_raw:
@@ -43,153 +72,286 @@ class ArticleNormalizer:
         return article
 
     async def normalize_batch(self, articles: List[Article]) -> List[Article]:
-        """Normalize a batch of articles"""
-        normalized = []
-        for article in articles:
+        """
+        Normalize a batch of articles, cleaning their text in one pass (sharded if large)
+
+        Articles whose raw fields were normalized before (e.g. re-fetched in an overlapping
+        window) take their results from the processing cache instead.
+        """
+        keys = [self._processing_key(article) for article in articles]
+        entries = await asyncio.to_thread(self._cached_entries, keys)
+
+        misses = [i for i, entry in enumerate(entries) if entry is None]
+        cleaned = await clean_batch(
+            [(articles[i].title, articles[i].summary_raw, articles[i].text_raw) for i in misses]
+        )
+
+        new_entries = {}
+        for i, (title, summary, text) in zip(misses, cleaned):
+            entry = {"title": title, "summary": summary, "text": text, "url": articles[i].url}
             try:
-                normalized_article = await self.normalize(article)
-                normalized.append(normalized_article)
+                entry["url"] = self._normalize_url(articles[i].url)
+                if keys[i]:
+                    new_entries[keys[i]] = entry
             except Exception as e:
-                print(f"Error normalizing article '{article.title}': {e}")
-                # Include original article even if normalization fails
-                normalized.append(article)
-        return normalized
+                # Keep the article even if normalization fails
+                print(f"Error normalizing article '{title}': {e}")
+            entries[i] = entry
 
-    def _clean_title(self, title: str) -> str:
-        """Clean and normalize title"""
-        if not title:
-            return "Untitled"
+        for article, entry in zip(articles, entries):
+            article.title, article.url = entry["title"], entry["url"]
+            article.summary_raw, article.text_raw = entry["summary"], entry["text"]
+            try:
+                article.published_at = self._normalize_date(article.published_at)
+            except Exception as e:
+                print(f"Error normalizing date of '{article.title}': {e}")
 
-        # Remove HTML tags
-        title = re.sub(r"<[^>]+>", "", title)
+        if new_entries:
+            await asyncio.to_thread(self._store_entries, new_entries)
 
-        # Remove extra whitespace
-        title = re.sub(r"\s+", " ", title).strip()
+        return articles
 
-        # Remove common prefixes/suffixes
-        patterns = [
-            r"^(BREAKING|UPDATE|EXCLUSIVE|URGENT):\s*",
-            r"\s*-\s*[A-Z\s]+$",  # Remove " - SITENAME" suffixes
-        ]
-        for pattern in patterns:
-            title = re.sub(pattern, "", title, flags=re.IGNORECASE)
+    async def resolve_canonical_urls(
+        self, articles: List[Article], client: Optional[httpx.AsyncClient] = None
+    ) -> List[Article]:
+        """
+        Replace article URLs with the canonical URL their pages declare, concurrently
 
-        return title.strip()
+        Only URLs the offline rules leave undecided are fetched. Lookups share a global
+        concurrency cap and a per-domain request spacing; lookups still pending at the
+        stage deadline are abandoned and those articles keep their URL.
 
-    def _clean_text(self, text: str) -> str:
-        """Clean and normalize text content"""
-        if not text:
-            return ""
+        Args:
+            articles: Normalized articles
+            client: Client for the page fetches (defaults to the normalizer's own)
+
+        Returns:
+            The same articles, in input order
+        """
+        deadline = asyncio.get_running_loop().time() + settings.normalize_stage_timeout_seconds
+
+        async def resolve_one(article: Article) -> Article:
+            try:
+                article.url = await self._resolve_url(article.url, deadline, client)
+            except Exception as e:
+                print(f"Error resolving URL of '{article.title}': {e}")
+            return article
+
+        return list(await asyncio.gather(*(resolve_one(article) for article in articles)))
+
+    def _processing_key(self, article: Article) -> Optional[str]:
+        """Processing cache key of an article's raw fields (None if the cache is off)"""
+        if not settings.processing_cache_enabled:
+            return None
+        return content_key(
+            "normalize",
+            f"{NORMALIZE_VERSION}:{self.canonicalizer.version}",
+            article.title,
+            article.url,
+            article.summary_raw,
+            article.text_raw,
+        )
+
+    def _cached_entries(self, keys: List[Optional[str]]) -> List[Optional[dict]]:
+        """Look up normalized fields in the processing cache"""
+        return [self.processing_cache.get(key) if key else None for key in keys]
+
+    def _store_entries(self, entries: Dict[str, dict]):
+        """Store normalized fields in the processing cache"""
+        for key, entry in entries.items():
+            self.processing_cache.set(key, entry)
 
-        # Parse HTML if present
-        soup = BeautifulSoup(text, "html.parser")
-        text = soup.get_text()
+    def _clean_title(self, title: str) -> str:
+        """Clean and normalize title"""
+        return clean_title(title)
 
-        # Remove extra whitespace
-        text = re.sub(r"\s+", " ", text).strip()
+    def _normalize_date(self, published_at: datetime) -> datetime:
+        """Convert a publication datetime to naive UTC (naive input is assumed UTC)"""
+        if published_at.tzinfo is None:
+            return published_at
+        return published_at.astimezone(timezone.utc).replace(tzinfo=None)
 
-        return text
+    def _clean_text(self, text: str) -> str:
+        """Clean and normalize text content"""
+        return clean_text(text)
 
-    async def _normalize_url(self, url: str) -> str:
+    def _normalize_url(self, url: str) -> str:
         """
-        Normalize URL to canonical form
+        Normalize URL with the offline canonicalization rules
 
         Args:
             url: Original URL
 
         Returns:
-            Canonical URL
+            Cleaned URL
         """
         if not url:
             return ""
+        return self.canonicalizer.canonicalize(url).url
+
+    async def _resolve_url(
+        self,
+        url: str,
+        deadline: Optional[float] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> str:
+        """
+        Resolve a cleaned URL to the canonical URL its page declares
 
-        # Parse URL
-        parsed = urlparse(url)
+        Args:
+            url: URL cleaned by _normalize_url
+            deadline: Event loop time after which the page is not fetched
+            client: Client for the page fetch (defaults to the normalizer's own)
 
-        # If it's a gmail: pseudo-URL, return as-is
-        if parsed.scheme == "gmail":
-            return url
+        Returns:
+            Canonical URL, or the URL itself if the rules settle it or the lookup fails
+        """
+        if not url:
+            return ""
 
-        # Remove tracking parameters
-        if parsed.query:
-            # Common tracking parameters to remove
-            tracking_params = {
-                "utm_source",
-                "utm_medium",
-                "utm_campaign",
-                "utm_term",
-                "utm_content",
-                "fbclid",
-                "gclid",
-                "ref",
-                "source",
-            }
-
-            # Parse query string
-            from urllib.parse import parse_qs, urlencode
-
-            params = parse_qs(parsed.query)
-            # Filter out tracking params
-            clean_params = {k: v for k, v in params.items() if k not in tracking_params}
-
-            # Rebuild URL
-            from urllib.parse import urlunparse
-
-            parsed = parsed._replace(query=urlencode(clean_params, doseq=True))
-            url = urlunparse(parsed)
+        # Only publishers whose URLs the rules cannot settle are fetched
+        if not self.canonicalizer.canonicalize(url).resolve:
+            return url
 
         # Try to fetch canonical URL from page (with timeout)
         try:
-            canonical = await self._fetch_canonical_url(url)
+            canonical = await self._resolve_canonical_url(url, deadline, client)
             if canonical:
-                return canonical
+                return self.canonicalizer.canonicalize(canonical).url
         except Exception:
             pass  # If we can't fetch canonical, use cleaned URL
 
         return url
 
-    async def _fetch_canonical_url(self, url: str) -> str:
+    async def _resolve_canonical_url(
+        self,
+        url: str,
+        deadline: Optional[float] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> str:
+        """
+        Get the canonical URL of a page, from the cache when it was resolved recently
+
+        Args:
+            url: Cleaned URL
+            deadline: Event loop time after which the page is not fetched
+            client: Client for the page fetch (defaults to the normalizer's own)
+
+        Returns:
+            Canonical URL, or empty string if it could not be resolved
+        """
+        now = time.time()
+        cached = self.canonical_cache.get(url)
+        if cached is not None and cached["expires_at"] > now:
+            return cached["canonical"]
+
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                return ""
+
+        try:
+            canonical = await asyncio.wait_for(
+                self._polite_fetch_canonical_url(url, client), timeout
+            )
+        except asyncio.TimeoutError:
+            return ""  # Out of stage time, not the page's fault: leave it uncached
+
+        # Failures are cached briefly so a flaky page is retried on a later run
+        if canonical:
+            ttl = settings.canonical_cache_ttl_hours * 3600
+        else:
+            ttl = settings.canonical_cache_negative_ttl_minutes * 60
+        self.canonical_cache.set(url, {"canonical": canonical, "expires_at": now + ttl})
+
+        return canonical
+
+    async def _polite_fetch_canonical_url(
+        self, url: str, client: Optional[httpx.AsyncClient] = None
+    ) -> str:
+        """Fetch a canonical URL within the concurrency cap and per-domain request spacing"""
+        # Reserve the next free slot for this domain before waiting, so lookups queue fairly
+        loop = asyncio.get_running_loop()
+        domain = urlparse(url).netloc.lower()
+        now = loop.time()
+        slot = max(now, self._next_domain_slot.get(domain, now))
+        self._next_domain_slot[domain] = slot + settings.normalize_domain_interval_seconds
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+        async with self._lookup_limit:
+            return await self._fetch_canonical_url(url, client)
+
+    async def _fetch_canonical_url(
+        self, url: str, client: Optional[httpx.AsyncClient] = None
+    ) -> str:
         """
         Fetch canonical URL from page's <link rel="canonical">
 
+        Streams a single GET and stops reading at the end of <head> (or after
+        canonical_head_max_bytes), so the page body is never downloaded.
+
         Args:
             url: URL to check
+            client: Client to fetch with (defaults to the normalizer's own)
 
         Returns:
-            Canonical URL if found, empty string otherwise
+            Canonical URL if found (or the URL redirects ended at), empty string otherwise
         """
         try:
-            async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
-                response = await client.head(url)
+            async with shared_client(client or self.client) as client:
+                async with client.stream("GET", url, timeout=self.timeout) as response:
+                    if response.status_code >= 400:
+                        return ""
 
-                # If HEAD fails, try GET but limit size
-                if response.status_code >= 400:
-                    response = await client.get(url, timeout=self.timeout)
+                    # Check for canonical redirect
+                    final_url = str(response.url)
 
-                # Check for canonical redirect
-                final_url = str(response.url)
+                    # Only HTML pages can declare a canonical link
+                    content_type = response.headers.get("content-type", "")
+                    if "text/html" not in content_type:
+                        return final_url
 
-                # Try to parse HTML for canonical link (only if HTML)
-                content_type = response.headers.get("content-type", "")
-                if "text/html" in content_type:
-                    # Fetch just the head section
-                    response = await client.get(url, timeout=self.timeout)
-                    html = response.text[:10000]  # First 10KB should contain <head>
+                    head = await self._read_head(response)
 
-                    soup = BeautifulSoup(html, "html.parser")
-                    canonical_link = soup.find("link", {"rel": "canonical"})
-
-                    if canonical_link and canonical_link.get("href"):
-                        canonical = canonical_link["href"]
-                        # Make absolute if relative
-                        if not urlparse(canonical).netloc:
-                            canonical = urljoin(url, canonical)
-                        return canonical
+            canonical = self._parse_canonical_link(head, response.charset_encoding)
+            if canonical:
+                # Make absolute if relative
+                return urljoin(final_url, canonical)
 
-                return final_url
+            return final_url
 
         except httpx.TimeoutException:
             return ""
         except Exception as e:
             print(f"Error fetching canonical URL for {url}: {e}")
             return ""
+
+    async def _read_head(self, response: httpx.Response) -> bytes:
+        """Read a streaming HTML response up to the end of its <head> or the byte cap"""
+        max_bytes = settings.canonical_head_max_bytes
+        data = bytearray()
+
+        async for chunk in response.aiter_bytes():
+            # Search only the new bytes, plus enough overlap for a tag split across chunks
+            search_from = max(0, len(data) - len(HEAD_END))
+            data.extend(chunk)
+
+            end = data[search_from:].lower().find(HEAD_END)
+            if end != -1:
+                return bytes(data[: search_from + end])
+            if len(data) >= max_bytes:
+                break
+
+        return bytes(data[:max_bytes])
+
+    def _parse_canonical_link(self, head: bytes, encoding: Optional[str]) -> str:
+        """Extract the href of <link rel="canonical"> from the start of an HTML page"""
+        html = head.decode(encoding or "utf-8", errors="replace")
+        soup = BeautifulSoup(html, "html.parser")
+        canonical_link = soup.find("link", {"rel": "canonical"})
+
+        if canonical_link and canonical_link.get("href"):
+            return canonical_link["href"].strip()
+        return ""
@@ -2,45 +2,16 @@
 
 import math
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 
 from app.models import Article
 
+from .keywords import KeywordTables, article_text, get_keyword_tables
+
 
 class ArticleRanker:
     """Ranks articles based on multiple factors"""
 
-    # Source weights (higher = more important)
-    SOURCE_WEIGHTS = {
-        "reuters": 2.0,
-        "enterprise": 1.8,
-        "gmail": 1.5,  # Enterprise via Gmail
-        "rss": 1.0,
-    }
-
-    # Keyword boosts
-    KEYWORD_BOOSTS = {
-        "fx": 1.5,
-        "foreign exchange": 1.5,
-        "currency": 1.3,
-        "budget": 1.4,
-        "shipping": 1.3,
-        "port": 1.3,
-        "logistics": 1.2,
-        "suez": 1.4,
-        "oil": 1.3,
-        "gas": 1.2,
-        "ipo": 1.5,
-        "listing": 1.4,
-        "investment": 1.2,
-        "merger": 1.4,
-        "acquisition": 1.4,
-        "policy": 1.2,
-        "regulation": 1.2,
-        "central bank": 1.5,
-        "interest rate": 1.4,
-    }
-
     def __init__(self, half_life_hours: float = 36.0):
         """
         Initialize ranker
@@ -62,12 +33,13 @@ class ArticleRanker:
             Articles with scores set, sorted by score (highest first)
         """
         now = datetime.now(timezone.utc)
+        tables = get_keyword_tables()  # One version of the weights for the whole batch
 
         for article in articles:
             # Calculate components
             recency_score = self._calculate_recency_score(article.published_at, now)
-            source_score = self._calculate_source_score(article, source_map)
-            keyword_score = self._calculate_keyword_score(article)
+            source_score = self._calculate_source_score(article, source_map, tables)
+            keyword_score = self._calculate_keyword_score(article, tables)
 
             # Combined score
             article.score = recency_score * source_score * keyword_score
@@ -102,13 +74,16 @@ class ArticleRanker:
 
         return max(0.0, min(1.0, score))  # Clamp to [0, 1]
 
-    def _calculate_source_score(self, article: Article, source_map: dict = None) -> float:
+    def _calculate_source_score(
+        self, article: Article, source_map: dict = None, tables: Optional[KeywordTables] = None
+    ) -> float:
         """
         Calculate source weight
 
         Args:
             article: Article
             source_map: Dict mapping source_id to source info
+            tables: Keyword tables holding the source weights
 
         Returns:
             Source weight multiplier
@@ -120,28 +95,31 @@ class ArticleRanker:
         source_type = source_info.get("type", "rss")
 
         # Get base weight from source type
-        for key, weight in self.SOURCE_WEIGHTS.items():
+        tables = tables or get_keyword_tables()
+        for key, weight in tables.source_weights.items():
             if key in source_type.lower():
                 return weight
 
         return 1.0
 
-    def _calculate_keyword_score(self, article: Article) -> float:
+    def _calculate_keyword_score(
+        self, article: Article, tables: Optional[KeywordTables] = None
+    ) -> float:
         """
         Calculate keyword boost score
 
         Args:
             article: Article
+            tables: Keyword tables holding the boosts
 
         Returns:
             Keyword boost multiplier
         """
-        text = f"{article.title} {article.summary_raw or ''}".lower()
+        tables = tables or get_keyword_tables()
+        hits = tables.engine.scan(article_text(article.title, article.summary_raw))
 
         # Find all matching keywords and apply highest boost
-        boosts = [
-            boost for keyword, boost in self.KEYWORD_BOOSTS.items() if keyword.lower() in text
-        ]
+        boosts = [tables.keyword_boosts[keyword] for keyword in hits["boost"]]
 
         if not boosts:
             return 1.0
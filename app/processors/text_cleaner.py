@@ -0,0 +1,109 @@
+"""Batch text cleaning for titles, summaries and article text"""
+
+import asyncio
+import html
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import lxml.html
+from lxml.etree import ParserError
+
+from app.config import settings
+from app.workers import run_in_pool
+
+TAG = re.compile(r"<[^>]+>")
+SCRIPT_OR_STYLE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+WHITESPACE = re.compile(r"\s+")
+TITLE_PREFIX = re.compile(r"^(BREAKING|UPDATE|EXCLUSIVE|URGENT):\s*", re.IGNORECASE)
+TITLE_SITE_SUFFIX = re.compile(r"\s*-\s*[A-Z\s]+$", re.IGNORECASE)  # " - SITENAME"
+
+Fields = Tuple[Optional[str], Optional[str], Optional[str]]  # title, summary, text
+
+
+def clean_title(title: Optional[str]) -> str:
+    """
+    Clean and normalize a title
+
+    Args:
+        title: Raw title
+
+    Returns:
+        Title without tags, extra whitespace or wire prefixes and site suffixes
+    """
+    if not title:
+        return "Untitled"
+
+    title = WHITESPACE.sub(" ", TAG.sub("", title)).strip()
+    title = TITLE_SITE_SUFFIX.sub("", TITLE_PREFIX.sub("", title))
+
+    return title.strip()
+
+
+def clean_text(text: Optional[str]) -> str:
+    """
+    Convert HTML (or plain text) to plain text with collapsed whitespace
+
+    Args:
+        text: Raw summary or article text
+
+    Returns:
+        Cleaned text
+    """
+    if not text:
+        return ""
+
+    # Fast path: most feed summaries carry no markup at all
+    if "<" not in text:
+        if "&" in text:
+            text = html.unescape(text)
+        return WHITESPACE.sub(" ", text).strip()
+
+    try:
+        fragment = lxml.html.fragment_fromstring(text, create_parent="div")
+        # Inline CSS and JS are not text (BeautifulSoup's get_text() skips them too)
+        for element in list(fragment.iter("script", "style")):
+            element.drop_tree()
+        text = fragment.text_content()
+    except (ParserError, ValueError):
+        text = html.unescape(TAG.sub("", SCRIPT_OR_STYLE.sub("", text)))
+
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def clean_fields(items: Sequence[Fields]) -> List[Fields]:
+    """
+    Clean the title, summary and text of many articles (runs in the worker pool)
+
+    Args:
+        items: (title, summary, text) tuples
+
+    Returns:
+        Cleaned (title, summary, text) tuples; missing summaries and texts stay None
+    """
+    return [
+        (
+            clean_title(title),
+            clean_text(summary) if summary else summary,
+            clean_text(text) if text else text,
+        )
+        for title, summary, text in items
+    ]
+
+
+async def clean_batch(items: Sequence[Fields]) -> List[Fields]:
+    """
+    Clean a batch of articles, sharding large batches across the worker pool
+
+    Args:
+        items: (title, summary, text) tuples
+
+    Returns:
+        Cleaned (title, summary, text) tuples, in input order
+    """
+    shard_size = settings.clean_shard_size
+    if len(items) <= shard_size:
+        return clean_fields(items)
+
+    shards = [items[i : i + shard_size] for i in range(0, len(items), shard_size)]
+    results = await asyncio.gather(*(run_in_pool(clean_fields, shard) for shard in shards))
+    return [fields for shard in results for fields in shard]
@@ -0,0 +1,344 @@
+"""Hashed-feature naive Bayes classifier trained from stored articles"""
+
+import hashlib
+import importlib.util
+import io
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.models import Article
+
+from .keywords import article_text, tokenize
+
+if TYPE_CHECKING:
+    import numpy as np
+
+HEADS = ("region", "section")  # Article.region_tag, Article.section_tag
+FORMAT_VERSION = 1
+MULTIPLIER = 0x100000001B3  # Combines the two word hashes of a bigram
+MIXER = 0x9E3779B97F4A7C15  # Fibonacci hashing: the top bits of hash * MIXER pick a bucket
+
+
+def numpy_available() -> bool:
+    """
+    Whether NumPy is installed, checked without importing it
+
+    NumPy is optional and slow to import, so it is only imported once a model is trained
+    or loaded.
+    """
+    return importlib.util.find_spec("numpy") is not None
+
+
+def featurize(texts: Sequence[str], num_features: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Hash word unigrams and bigrams of many texts into feature buckets
+
+    Words are hashed once each in Python; bigrams and bucket numbers are then computed for
+    the whole batch at once with array arithmetic.
+
+    Args:
+        texts: Texts to featurize
+        num_features: Number of buckets (a power of two)
+
+    Returns:
+        (features, rows): bucket of each feature occurrence, and the text it belongs to
+    """
+    import numpy as np
+
+    hashes: Dict[str, int] = {}  # Words repeat a lot, so hash each distinct one once
+
+    def word_hash(word: str) -> int:
+        value = hashes[word] = zlib.crc32(word.encode("utf-8"))
+        return value
+
+    words: List[int] = []
+    lengths: List[int] = []
+    for text in texts:
+        tokens = tokenize(text)
+        words.extend([hashes[t] if t in hashes else word_hash(t) for t in tokens])
+        lengths.append(len(tokens))
+
+    words = np.array(words, dtype=np.uint64)
+    rows = np.repeat(np.arange(len(texts)), lengths)
+
+    # Adjacent words of the same text form a bigram
+    same_text = rows[:-1] == rows[1:]
+    bigrams = words[:-1][same_text] * MULTIPLIER + words[1:][same_text]
+
+    shift = np.uint64(64 - (num_features.bit_length() - 1))
+    features = np.concatenate([words * MIXER >> shift, bigrams * MIXER >> shift])
+    return features.astype(np.int64), np.concatenate([rows, rows[:-1][same_text]])
+
+
+class TextModel:
+    """
+    Multinomial naive Bayes over hashed word features, one set of classes per head
+
+    Prediction is a single pass of array operations over a whole batch: each text's score
+    for a class is the class prior plus the sum of its features' log-likelihoods.
+    """
+
+    def __init__(
+        self,
+        num_features: int,
+        classes: Dict[str, "np.ndarray"],
+        log_priors: Dict[str, "np.ndarray"],
+        log_likelihoods: Dict[str, "np.ndarray"],
+        version: str = "unsaved",
+    ):
+        self.num_features = num_features
+        self.version = version  # Hash of the model file it was loaded from
+        self.classes = classes  # head -> class labels (C,)
+        self.log_priors = log_priors  # head -> (C,)
+        self.log_likelihoods = log_likelihoods  # head -> (num_features, C)
+
+    @property
+    def heads(self) -> List[str]:
+        """Heads the model was trained for"""
+        return list(self.classes)
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Dict[str, Sequence[Optional[str]]],
+        num_features: int = 2**17,
+        alpha: float = 0.1,
+        min_examples: int = 20,
+    ) -> "TextModel":
+        """
+        Train a model
+
+        Args:
+            texts: Training texts
+            labels: head -> label per text (None where the text has no label for that head)
+            num_features: Number of hash buckets (a power of two)
+            alpha: Additive smoothing
+            min_examples: Classes with fewer labelled texts are left out
+
+        Returns:
+            Trained model (heads with fewer than two usable classes are left out)
+        """
+        import numpy as np
+
+        indices, rows = featurize(texts, num_features)
+
+        classes, log_priors, log_likelihoods = {}, {}, {}
+        for head, head_labels in labels.items():
+            head_labels = np.array(
+                [label if label is not None else "" for label in head_labels], dtype=object
+            )
+            names, counts = np.unique(head_labels[head_labels != ""], return_counts=True)
+            names = names[counts >= min_examples]
+            if len(names) < 2:
+                continue
+
+            class_of_text = np.full(len(texts), -1, dtype=np.int64)
+            for i, name in enumerate(names):
+                class_of_text[head_labels == name] = i
+
+            feature_classes = class_of_text[rows]
+            labelled = feature_classes >= 0
+            feature_counts = np.bincount(
+                feature_classes[labelled] * num_features + indices[labelled],
+                minlength=len(names) * num_features,
+            ).reshape(len(names), num_features)
+
+            smoothed = feature_counts + alpha
+            class_sizes = np.bincount(class_of_text[class_of_text >= 0], minlength=len(names))
+
+            classes[head] = names.astype(str)
+            log_priors[head] = np.log(class_sizes / class_sizes.sum()).astype(np.float32)
+            log_likelihoods[head] = (
+                (np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True)))
+                .T.astype(np.float32)
+                .copy()
+            )
+
+        return cls(num_features, classes, log_priors, log_likelihoods)
+
+    def predict(
+        self, texts: Sequence[str], min_confidence: float = 0.0
+    ) -> Dict[str, List[Optional[str]]]:
+        """
+        Predict labels for a batch of texts
+
+        Args:
+            texts: Texts to classify
+            min_confidence: Posterior probability below which no label is returned
+
+        Returns:
+            head -> predicted label per text (None if unsure or the text has no words)
+        """
+        import numpy as np
+
+        if not texts:
+            return {head: [] for head in self.heads}
+
+        indices, rows = featurize(texts, self.num_features)
+        lengths = np.bincount(rows, minlength=len(texts))
+
+        predictions = {}
+        for head, names in self.classes.items():
+            weights = self.log_likelihoods[head][indices]  # (nnz, C)
+            scores = np.stack(
+                [
+                    np.bincount(rows, weights=weights[:, c], minlength=len(texts))
+                    for c in range(len(names))
+                ],
+                axis=1,
+            )
+            scores += self.log_priors[head]
+
+            # Posterior of the winning class, computed stably from log scores
+            best = scores.argmax(axis=1)
+            shifted = np.exp(scores - scores.max(axis=1, keepdims=True))
+            confidence = 1.0 / shifted.sum(axis=1)
+
+            sure = (confidence >= min_confidence) & (lengths > 0)
+            predictions[head] = [
+                str(names[b]) if ok else None for b, ok in zip(best.tolist(), sure.tolist())
+            ]
+
+        return predictions
+
+    def save(self, path: Path):
+        """Write the model atomically as a compressed .npz file"""
+        import numpy as np
+
+        arrays = {
+            "format_version": np.array(FORMAT_VERSION),
+            "num_features": np.array(self.num_features),
+        }
+        for head in self.heads:
+            arrays[f"{head}_classes"] = self.classes[head]
+            arrays[f"{head}_log_priors"] = self.log_priors[head]
+            arrays[f"{head}_log_likelihoods"] = self.log_likelihoods[head]
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "TextModel":
+        """
+        Read a model written by save()
+
+        Raises:
+            ValueError: If the file is not a model in a supported format
+        """
+        import numpy as np
+
+        content = path.read_bytes()
+        with np.load(io.BytesIO(content), allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported model format {int(data['format_version'])}")
+
+            heads = [head for head in HEADS if f"{head}_classes" in data]
+            return cls(
+                int(data["num_features"]),
+                {head: data[f"{head}_classes"] for head in heads},
+                {head: data[f"{head}_log_priors"] for head in heads},
+                {head: data[f"{head}_log_likelihoods"] for head in heads},
+                hashlib.sha256(content).hexdigest()[:16],
+            )
+
+
+_model: Optional[TextModel] = None
+_loaded_stamp: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the loaded file
+_load_lock = threading.Lock()
+
+
+def get_text_model() -> Optional[TextModel]:
+    """
+    Get the trained model, reloading it if the file changed
+
+    Returns:
+        The model, or None if NumPy is missing or no usable model file exists
+    """
+    global _model, _loaded_stamp
+
+    if not settings.classifier_model_path:
+        return None
+
+    path = Path(settings.classifier_model_path)
+    try:
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+    if stamp == _loaded_stamp:
+        return _model
+
+    # Only checked once a model file exists; loading it is what imports NumPy
+    if not numpy_available():
+        return None
+
+    with _load_lock:
+        if stamp != _loaded_stamp:
+            try:
+                model = TextModel.load(path)
+                print(f"Loaded classifier model from {path} (heads: {', '.join(model.heads)})")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error loading classifier model from {path}: {e}")
+                model = None
+            _model, _loaded_stamp = model, stamp
+
+    return _model
+
+
+def train_from_database(path: Optional[Path] = None) -> Optional[TextModel]:
+    """
+    Train a model on the tagged articles in the database and save it
+
+    Args:
+        path: Where to save the model (defaults to settings.classifier_model_path)
+
+    Returns:
+        The trained model, or None if there is not enough labelled data
+    """
+    from app.database import engine
+
+    path = path or (
+        Path(settings.classifier_model_path) if settings.classifier_model_path else None
+    )
+    if path is None:
+        print("No classifier model path configured (CLASSIFIER_MODEL_PATH)")
+        return None
+
+    if not numpy_available():
+        print("NumPy is not installed; cannot train the classifier model")
+        return None
+
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Article.title, Article.summary_raw, Article.region_tag, Article.section_tag)
+        ).all()
+
+    model = TextModel.train(
+        [article_text(title, summary) for title, summary, _, _ in rows],
+        {
+            "region": [region for _, _, region, _ in rows],
+            "section": [section for _, _, _, section in rows],
+        },
+    )
+    if not model.heads:
+        print(f"Not enough labelled articles to train a classifier ({len(rows)} stored)")
+        return None
+
+    model.save(path)
+    print(f"✓ Trained classifier on {len(rows)} articles ({', '.join(model.heads)}) -> {path}")
+    return model
+
+
+if __name__ == "__main__":
+    train_from_database()
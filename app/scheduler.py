@@ -1,22 +1,34 @@
-"""Scheduler for daily digest generation"""
+"""Scheduler for daily digest generation and background ingestion"""
 
 import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
 
 import pytz
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlmodel import Session, select
 
 from app.config import settings
+from app.database import engine
+from app.models import Source
 from app.pipeline import DigestPipeline
+from app.websub import WebSubSubscriber, active_source_ids
 
 
 class DigestScheduler:
-    """Scheduler for daily digest generation"""
+    """Scheduler for daily digest generation and background ingestion"""
 
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
         self.pipeline = DigestPipeline()
         self.timezone = pytz.timezone(settings.tz)
+        self.ingesting = False
+        self._next_poll: Dict[int, float] = {}  # source_id -> monotonic time of next poll
+        self._sources_ready = False
+        self.subscriber = WebSubSubscriber()
 
     def start(self):
         """Start the scheduler"""
@@ -35,28 +47,109 @@ class DigestScheduler:
             replace_existing=True,
         )
 
+        # Poll sources continuously so the digest only has to read the database
+        if settings.ingest_enabled:
+            self.scheduler.add_job(
+                self._ingest_due_sources,
+                trigger=IntervalTrigger(seconds=settings.ingest_tick_seconds),
+                id="background_ingest",
+                name="Background ingestion",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+                next_run_time=datetime.now(self.timezone),
+            )
+            self.ingesting = True
+
+        # Keep WebSub subscriptions of pushed feeds verified and renewed
+        if self.subscriber.enabled:
+            self.scheduler.add_job(
+                self._renew_websub,
+                trigger=IntervalTrigger(minutes=60),
+                id="websub_renew",
+                name="WebSub subscription renewal",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+                next_run_time=datetime.now(self.timezone),
+            )
+
         self.scheduler.start()
         print(
             f"✓ Scheduler started - digest will run daily at "
             f"{settings.digest_schedule_hour:02d}:{settings.digest_schedule_minute:02d} {settings.tz}"
         )
+        if self.ingesting:
+            print(
+                f"✓ Background ingestion polling sources every "
+                f"{settings.ingest_poll_interval_minutes} minutes by default"
+            )
 
     def stop(self):
         """Stop the scheduler"""
         self.scheduler.shutdown()
+        self.ingesting = False
         print("✓ Scheduler stopped")
 
     async def _run_digest(self):
         """Run the digest pipeline (scheduled task)"""
         print("\n[SCHEDULED] Running daily digest...")
         try:
-            await self.pipeline.run()
+            await self.pipeline.run(ingest=not self.ingesting)
         except Exception as e:
             print(f"[SCHEDULED] Error running digest: {e}")
             import traceback
 
             traceback.print_exc()
 
-    async def run_now(self):
-        """Run digest immediately (for manual triggers)"""
-        return await self.pipeline.run()
+    async def _ingest_due_sources(self):
+        """Ingest every source whose poll interval has elapsed (background task)"""
+        try:
+            if not self._sources_ready:
+                await self.pipeline._init_sources()
+                self._sources_ready = True
+
+            with Session(engine) as session:
+                sources = session.exec(select(Source).where(Source.is_active == True)).all()
+
+            now = time.monotonic()
+            due = [source for source in sources if now >= self._next_poll.get(source.id, 0)]
+            if not due:
+                return
+
+            pushed = active_source_ids()
+            for source in due:
+                self._next_poll[source.id] = now + self._poll_interval(source, pushed)
+
+            print(f"\n[INGEST] Polling {len(due)} sources...")
+            since = datetime.now(timezone.utc) - timedelta(hours=settings.ingest_lookback_hours)
+            stored = await self.pipeline.ingest(since, due)
+            print(f"[INGEST] Stored {stored} new articles")
+
+        except Exception as e:
+            print(f"[INGEST] Error ingesting sources: {e}")
+            import traceback
+
+            traceback.print_exc()
+
+    def _poll_interval(self, source: Source, pushed: Set[int]) -> float:
+        """Seconds between polls of a source (config poll_interval_minutes overrides default)"""
+        # Sources receiving WebSub pushes are only polled as a fallback
+        if source.id in pushed:
+            return float(settings.websub_fallback_poll_minutes) * 60
+
+        minutes = source.config.get("poll_interval_minutes", settings.ingest_poll_interval_minutes)
+        return float(minutes) * 60
+
+    async def _renew_websub(self):
+        """Subscribe newly discovered hubs and renew expiring leases (background task)"""
+        try:
+            accepted = await self.subscriber.renew()
+            if accepted:
+                print(f"[WEBSUB] {accepted} subscription requests accepted by hubs")
+        except Exception as e:
+            print(f"[WEBSUB] Error renewing subscriptions: {e}")
+
+    async def run_now(self, date: Optional[str] = None, replay: bool = False):
+        """Run digest immediately (for manual triggers), optionally replaying archived payloads"""
+        return await self.pipeline.run(date, ingest=not self.ingesting, replay=replay)
@@ -0,0 +1,93 @@
+"""Per-source circuit breaker for the fetch stage"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.database import engine
+from app.models import SourceHealth
+
+
+def open_circuits(
+    source_ids: Iterable[int], now: Optional[datetime] = None
+) -> Dict[int, SourceHealth]:
+    """
+    Find sources whose circuit is open, i.e. that should be skipped for now
+
+    Args:
+        source_ids: Sources about to be fetched
+        now: Current UTC time (default: now)
+
+    Returns:
+        Mapping of source ID to its health record, for skipped sources only
+    """
+    now = now or datetime.utcnow()
+    source_ids = list(source_ids)
+    if not source_ids:
+        return {}
+
+    with Session(engine) as session:
+        records = session.exec(
+            select(SourceHealth).where(
+                SourceHealth.source_id.in_(source_ids), SourceHealth.open_until > now
+            )
+        ).all()
+
+    return {record.source_id: record for record in records}
+
+
+def record_success(source_id: int):
+    """Close the circuit of a source after a successful fetch"""
+    with Session(engine) as session:
+        health = _get_or_create(session, source_id)
+        health.consecutive_failures = 0
+        health.open_until = None
+        health.last_success_at = health.updated_at = datetime.utcnow()
+        session.add(health)
+        session.commit()
+
+
+def record_failure(source_id: int, error: str) -> Optional[datetime]:
+    """
+    Count a failed or timed out fetch, opening the circuit after repeated failures
+
+    Args:
+        source_id: Source that failed
+        error: Description of the failure
+
+    Returns:
+        Time until which the source will be skipped, or None if it stays closed
+    """
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        health = _get_or_create(session, source_id)
+        health.consecutive_failures += 1
+        health.last_error = error[:500]
+        health.last_failure_at = health.updated_at = now
+
+        # Each failure past the threshold (including a failed half-open retry) doubles the wait
+        excess = health.consecutive_failures - settings.breaker_failure_threshold
+        if excess >= 0:
+            backoff = min(
+                settings.breaker_backoff_minutes * 2**excess,
+                settings.breaker_max_backoff_minutes,
+            )
+            health.open_until = now + timedelta(minutes=backoff)
+
+        session.add(health)
+        session.commit()
+        return health.open_until
+
+
+def list_health() -> List[SourceHealth]:
+    """Get health records for all sources that have been fetched"""
+    with Session(engine) as session:
+        return session.exec(select(SourceHealth).order_by(SourceHealth.source_id)).all()
+
+
+def _get_or_create(session: Session, source_id: int) -> SourceHealth:
+    """Load the health record of a source, creating an empty one if missing"""
+    health = session.exec(select(SourceHealth).where(SourceHealth.source_id == source_id)).first()
+    return health or SourceHealth(source_id=source_id)
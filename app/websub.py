@@ -0,0 +1,318 @@
+"""WebSub push subscriptions for RSS sources"""
+
+import hashlib
+import hmac
+import secrets
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Optional, Set, Tuple
+
+import httpx
+from sqlmodel import Session, or_, select
+
+from app.config import settings
+from app.database import engine
+from app.http_client import shared_client
+from app.models import Source, WebSubSubscription
+
+if TYPE_CHECKING:
+    import feedparser
+
+SIGNATURE_METHODS = {"sha1", "sha256", "sha384", "sha512"}
+
+
+def discover_hub(feed: "feedparser.FeedParserDict") -> Tuple[Optional[str], Optional[str]]:
+    """
+    Find the WebSub hub and topic (self) URLs advertised by a parsed feed
+
+    Args:
+        feed: Parsed feed
+
+    Returns:
+        Tuple of (hub URL, topic URL), either of which may be None
+    """
+    hub_url = topic_url = None
+    for link in feed.get("feed", {}).get("links", []):
+        if link.get("rel") == "hub" and not hub_url:
+            hub_url = link.get("href")
+        elif link.get("rel") == "self" and not topic_url:
+            topic_url = link.get("href")
+
+    return hub_url, topic_url
+
+
+def record_hub(source_id: int, hub_url: str, topic_url: str):
+    """
+    Remember the hub a source's feed advertises, queueing a subscription if it is new
+
+    Args:
+        source_id: RSS source ID
+        hub_url: Hub URL
+        topic_url: Topic (feed self) URL
+    """
+    with Session(engine) as session:
+        subscription = session.exec(
+            select(WebSubSubscription).where(WebSubSubscription.source_id == source_id)
+        ).first()
+
+        if subscription and (subscription.hub_url, subscription.topic_url) == (hub_url, topic_url):
+            return
+
+        if not subscription:
+            subscription = WebSubSubscription(
+                source_id=source_id,
+                hub_url=hub_url,
+                topic_url=topic_url,
+                secret=secrets.token_hex(20),
+            )
+
+        subscription.hub_url = hub_url
+        subscription.topic_url = topic_url
+        subscription.status = "pending"
+        subscription.expires_at = None
+        subscription.updated_at = datetime.utcnow()
+
+        session.add(subscription)
+        session.commit()
+
+
+def get_subscription(subscription_id: int, token: str) -> Optional[WebSubSubscription]:
+    """
+    Get a subscription by the ID and token in its callback URL
+
+    Returns:
+        The subscription, or None if it does not exist or the token does not match
+    """
+    with Session(engine) as session:
+        subscription = session.get(WebSubSubscription, subscription_id)
+
+    if not subscription or not hmac.compare_digest(subscription.callback_token, token):
+        return None
+    return subscription
+
+
+def active_source_ids() -> Set[int]:
+    """IDs of sources with a verified, unexpired subscription (polling is only a fallback)"""
+    with Session(engine) as session:
+        return set(
+            session.exec(
+                select(WebSubSubscription.source_id).where(
+                    WebSubSubscription.status == "active",
+                    WebSubSubscription.expires_at > datetime.utcnow(),
+                )
+            ).all()
+        )
+
+
+def verify_intent(subscription_id: int, token: str, params: dict) -> Optional[str]:
+    """
+    Handle a hub's verification of intent (or denial) for a subscription
+
+    Subscribe and unsubscribe are only confirmed while we have such a request outstanding,
+    so nobody but the hub we asked can change a subscription's state.
+
+    Args:
+        subscription_id: Subscription ID from the callback URL
+        token: Secret token from the callback URL
+        params: Query parameters sent by the hub
+
+    Returns:
+        Body to answer with (the challenge), or None to reject the request
+    """
+    mode = params.get("hub.mode")
+
+    with Session(engine) as session:
+        subscription = session.get(WebSubSubscription, subscription_id)
+        if (
+            not subscription
+            or not hmac.compare_digest(subscription.callback_token, token)
+            or params.get("hub.topic") != subscription.topic_url
+        ):
+            return None
+
+        if mode in ("subscribe", "unsubscribe") and mode != subscription.requested_mode:
+            print(f"WebSub: ignoring unsolicited {mode} verification for {subscription_id}")
+            return None
+
+        if mode == "subscribe":
+            lease_seconds = int(params.get("hub.lease_seconds") or settings.websub_lease_seconds)
+            subscription.status = "active"
+            subscription.lease_seconds = lease_seconds
+            subscription.expires_at = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        elif mode == "unsubscribe":
+            subscription.status = "unsubscribed"
+            subscription.expires_at = None
+        elif mode == "denied":
+            print(f"WebSub hub denied subscription {subscription_id}: {params.get('hub.reason')}")
+            subscription.status = "denied"
+            subscription.expires_at = None
+        else:
+            return None
+
+        subscription.requested_mode = None
+        subscription.updated_at = datetime.utcnow()
+        session.add(subscription)
+        session.commit()
+
+    # Denials carry no challenge; they only need a 2xx acknowledgement
+    return params.get("hub.challenge", "")
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """
+    Check the X-Hub-Signature header of distributed content
+
+    Args:
+        secret: Subscription secret
+        body: Raw request body
+        signature: Header value, e.g. "sha256=<hex digest>"
+
+    Returns:
+        True if the signature matches
+    """
+    if not signature or "=" not in signature:
+        return False
+
+    method, digest = signature.split("=", 1)
+    if method not in SIGNATURE_METHODS:
+        return False
+
+    expected = hmac.new(secret.encode("utf-8"), body, getattr(hashlib, method)).hexdigest()
+    return hmac.compare_digest(expected, digest.strip().lower())
+
+
+class WebSubSubscriber:
+    """Subscribes RSS sources to their WebSub hubs and keeps leases renewed"""
+
+    def __init__(self, callback_base_url: Optional[str] = None):
+        base_url = callback_base_url or settings.websub_callback_base_url or ""
+        self.callback_base_url = base_url.rstrip("/")
+
+    @property
+    def enabled(self) -> bool:
+        """WebSub needs a publicly reachable callback URL"""
+        return bool(self.callback_base_url)
+
+    def callback_url(self, subscription: WebSubSubscription) -> str:
+        """Callback URL the hub verifies and delivers content to (unguessable per subscription)"""
+        return (
+            f"{self.callback_base_url}/websub/callback/"
+            f"{subscription.id}/{subscription.callback_token}"
+        )
+
+    async def subscribe(
+        self, subscription: WebSubSubscription, client: Optional[httpx.AsyncClient] = None
+    ) -> bool:
+        """
+        Send a subscription request to the hub (verification happens asynchronously)
+
+        Args:
+            subscription: Subscription to request
+            client: Optional shared HTTP client
+
+        Returns:
+            True if the hub accepted the request
+        """
+        return await self._request(subscription, "subscribe", client)
+
+    async def unsubscribe(
+        self, subscription: WebSubSubscription, client: Optional[httpx.AsyncClient] = None
+    ) -> bool:
+        """
+        Send an unsubscription request to the hub (verification happens asynchronously)
+
+        Args:
+            subscription: Subscription to cancel
+            client: Optional shared HTTP client
+
+        Returns:
+            True if the hub accepted the request
+        """
+        return await self._request(subscription, "unsubscribe", client)
+
+    async def _request(
+        self, subscription: WebSubSubscription, mode: str, client: Optional[httpx.AsyncClient]
+    ) -> bool:
+        """Send a (un)subscription request, allowing the hub to verify that mode only"""
+        data = {
+            "hub.mode": mode,
+            "hub.topic": subscription.topic_url,
+            "hub.callback": self.callback_url(subscription),
+        }
+        if mode == "subscribe":
+            data["hub.secret"] = subscription.secret
+            data["hub.lease_seconds"] = str(settings.websub_lease_seconds)
+
+        # Recorded before sending: hubs may verify before they answer the request
+        _set_requested_mode(subscription.id, mode)
+
+        try:
+            async with shared_client(client) as http:
+                response = await http.post(subscription.hub_url, data=data)
+        except httpx.HTTPError as e:
+            print(f"Error sending WebSub {mode} to hub {subscription.hub_url}: {e}")
+            return False
+
+        if response.status_code not in (202, 204):
+            print(
+                f"WebSub hub {subscription.hub_url} rejected {mode} of "
+                f"subscription {subscription.id}: {response.status_code}"
+            )
+            return False
+
+        return True
+
+    async def renew(self, client: Optional[httpx.AsyncClient] = None) -> int:
+        """
+        Subscribe pending subscriptions, renew expiring leases and unsubscribe inactive sources
+
+        Args:
+            client: Optional shared HTTP client
+
+        Returns:
+            Number of subscription requests accepted by hubs
+        """
+        if not self.enabled:
+            return 0
+
+        renew_before = datetime.utcnow() + timedelta(seconds=settings.websub_renew_margin_seconds)
+        with Session(engine) as session:
+            subscriptions = session.exec(
+                select(WebSubSubscription)
+                .join(Source, Source.id == WebSubSubscription.source_id)
+                .where(
+                    Source.is_active == True,
+                    or_(
+                        WebSubSubscription.status == "pending",
+                        (WebSubSubscription.status == "active")
+                        & (WebSubSubscription.expires_at < renew_before),
+                    ),
+                )
+            ).all()
+
+            # Sources switched off since they were subscribed
+            stale = session.exec(
+                select(WebSubSubscription)
+                .join(Source, Source.id == WebSubSubscription.source_id)
+                .where(WebSubSubscription.status == "active", Source.is_active == False)
+            ).all()
+
+        accepted = 0
+        for subscription in subscriptions:
+            if await self.subscribe(subscription, client):
+                accepted += 1
+        for subscription in stale:
+            if await self.unsubscribe(subscription, client):
+                accepted += 1
+
+        return accepted
+
+
+def _set_requested_mode(subscription_id: int, mode: str):
+    """Record which request the hub may now verify"""
+    with Session(engine) as session:
+        subscription = session.get(WebSubSubscription, subscription_id)
+        if subscription:
+            subscription.requested_mode = mode
+            subscription.updated_at = datetime.utcnow()
+            session.add(subscription)
+            session.commit()
@@ -0,0 +1,58 @@
+"""Worker pool for CPU-bound parsing"""
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from app.config import settings
+
+_executor: Optional[Executor] = None
+
+
+def get_executor() -> Executor:
+    """
+    Get the shared parse pool, creating it on first use
+
+    The pool kind is configured with PARSE_EXECUTOR ("thread" or "process"). Functions sent
+    to a process pool must be module-level and take/return picklable values.
+
+    Returns:
+        Executor instance
+    """
+    global _executor
+
+    if _executor is None:
+        if settings.parse_executor == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.parse_workers)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.parse_workers, thread_name_prefix="parse"
+            )
+
+    return _executor
+
+
+async def run_in_pool(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a CPU-bound function in the parse pool and await its result
+
+    Args:
+        func: Function to run
+        *args: Positional arguments
+        **kwargs: Keyword arguments
+
+    Returns:
+        Function result
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Shut down the parse pool (it is recreated on next use)"""
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
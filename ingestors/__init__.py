@@ -1,8 +1,29 @@
 """News ingestors for various sources"""
 
+import importlib
+
 from .base import BaseIngestor
-from .gmail_enterprise import GmailIngestor
-from .reuters import ReutersIngestor
-from .rss import RSSIngestor
+from .registry import create_ingestor, get_ingestor_class, register_ingestor
+
+__all__ = [
+    "BaseIngestor",
+    "GmailIngestor",
+    "RSSIngestor",
+    "ReutersIngestor",
+    "create_ingestor",
+    "get_ingestor_class",
+    "register_ingestor",
+]
+
+# Concrete ingestors are imported lazily so their dependencies load on first use
+_LAZY = {
+    "GmailIngestor": ".gmail_enterprise",
+    "RSSIngestor": ".rss",
+    "ReutersIngestor": ".reuters",
+}
+
 
-__all__ = ["BaseIngestor", "GmailIngestor", "RSSIngestor", "ReutersIngestor"]
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
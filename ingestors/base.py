@@ -1,18 +1,38 @@
 """Base ingestor interface"""
 
+import asyncio
+import os
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import List
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Hashable, List, Optional, TypeVar
 
+import httpx
+
+from app import known_urls
+from app.archive import RawArchive
+from app.config import settings
+from app.http_client import SingleFlight
 from app.models import Article
 
+T = TypeVar("T")
+
 
 class BaseIngestor(ABC):
     """Base class for all ingestors"""
 
-    def __init__(self, source_id: int, config: dict):
+    def __init__(
+        self,
+        source_id: int,
+        config: dict,
+        client: Optional[httpx.AsyncClient] = None,
+        flights: Optional[SingleFlight] = None,
+    ):
         self.source_id = source_id
         self.config = config
+        self.client = client  # Shared pipeline client; a temporary one is used if None
+        self.flights = flights  # Per-run fetch coalescing; every call fetches if None
+        self.errors: List[str] = []  # Failures swallowed by fetch_articles, for health tracking
+        self.archive = RawArchive(os.path.join(settings.cache_dir, "archive"))
 
     @abstractmethod
     async def fetch_articles(self, since: datetime) -> List[Article]:
@@ -27,6 +47,73 @@ class BaseIngestor(ABC):
         """
         pass
 
+    def _record_error(self, message: str) -> None:
+        """
+        Report a fetch failure that is handled instead of raised
+
+        Args:
+            message: Human-readable description of the failure
+        """
+        print(message)
+        self.errors.append(message)
+
+    async def replay_articles(self, since: datetime, until: datetime) -> List[Article]:
+        """
+        Rebuild articles from archived raw payloads instead of the network
+
+        Args:
+            since: Fetch articles published after this datetime
+            until: Only use payloads fetched before this datetime (naive UTC)
+
+        Returns:
+            List of Article objects
+        """
+        print(f"Replay not supported for {type(self).__name__}, skipping source {self.source_id}")
+        return []
+
+    async def _archive_payload(self, kind: str, locator: str, body: bytes) -> None:
+        """
+        Keep a raw payload in the archive so it can be replayed later
+
+        Args:
+            kind: Payload kind, e.g. "feed"
+            locator: What was fetched (feed URL, API topic, message ID)
+            body: Raw payload bytes
+        """
+        if not settings.archive_enabled:
+            return
+        try:
+            await asyncio.to_thread(self.archive.store, self.source_id, kind, locator, body)
+        except Exception as e:
+            # Archiving is best effort and must never fail a fetch
+            print(f"Error archiving {kind} payload {locator}: {e}")
+
+    def _is_known(self, url: str) -> bool:
+        """Whether an entry URL was probably stored by an earlier run, so it can be skipped"""
+        return known_urls.is_known(url)
+
+    @staticmethod
+    def _naive_utc(value: datetime) -> datetime:
+        """Convert a datetime to naive UTC, as stored in the database (naive is assumed UTC)"""
+        if value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    async def _coalesce(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a fetch once per run for all sources sharing the same key
+
+        Args:
+            key: Identity of the fetch, e.g. a feed URL
+            func: Coroutine function performing the fetch
+
+        Returns:
+            Fetch result, shared with other consumers of the same key
+        """
+        if self.flights is None:
+            return await func()
+        return await self.flights.do(key, func)
+
     def _create_article(
         self,
         title: str,
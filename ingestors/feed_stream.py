@@ -0,0 +1,103 @@
+"""Incremental scanning of streamed RSS/Atom feeds"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from dateutil import parser as date_parser
+from lxml import etree
+
+# Local tag names (namespace stripped) of entries and of their publication dates
+ENTRY_TAGS = {"item", "entry"}
+DATE_TAGS = {"pubDate", "published", "updated", "date", "issued", "modified"}
+
+
+class FeedCutoffScanner:
+    """
+    Parses a feed chunk by chunk and detects when the remaining entries are too old
+
+    Feeds are almost always newest-first, so once `streak` consecutive entries are older
+    than `since` the rest of the document can be skipped.
+    """
+
+    def __init__(self, since: datetime, streak: int = 5):
+        self.since = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+        self.streak = streak
+        self.entries = 0
+        self.old_in_a_row = 0
+        self.disabled = False
+
+        self._parser = etree.XMLPullParser(events=("start", "end"), recover=True)
+        self._in_entry = False
+        self._entry_date: Optional[datetime] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Feed the next chunk of the document
+
+        Args:
+            chunk: Raw bytes as received from the network
+
+        Returns:
+            True once the cutoff has been reached and the download can stop
+        """
+        if self.disabled:
+            return False
+
+        try:
+            self._parser.feed(chunk)
+            for event, element in self._parser.read_events():
+                if self._handle(event, element):
+                    return True
+        except etree.LxmlError:
+            # Not something we can scan incrementally; let feedparser deal with it
+            self.disabled = True
+
+        return False
+
+    def _handle(self, event: str, element) -> bool:
+        """Process one parser event, returning True when the cutoff is reached"""
+        if not isinstance(element.tag, str):
+            return False  # Comments and processing instructions
+
+        tag = etree.QName(element).localname
+
+        if event == "start":
+            if tag in ENTRY_TAGS:
+                self._in_entry = True
+                self._entry_date = None
+            return False
+
+        if tag in DATE_TAGS and self._in_entry and self._entry_date is None:
+            self._entry_date = self._parse_date(element.text)
+            return False
+
+        if tag not in ENTRY_TAGS:
+            return False
+
+        self.entries += 1
+        self._in_entry = False
+
+        if self._entry_date and self._entry_date < self.since:
+            self.old_in_a_row += 1
+        else:
+            self.old_in_a_row = 0
+
+        # Drop finished entries so scanner memory stays flat on large feeds
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+        return self.old_in_a_row >= self.streak
+
+    @staticmethod
+    def _parse_date(text: Optional[str]) -> Optional[datetime]:
+        """Parse an RFC 822 or ISO 8601 date, assuming UTC when no offset is given"""
+        if not text:
+            return None
+
+        try:
+            parsed = date_parser.parse(text.strip())
+        except (ValueError, OverflowError):
+            return None
+
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
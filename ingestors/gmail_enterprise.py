@@ -1,33 +1,64 @@
 """Gmail ingestor for Enterprise Egypt newsletters"""
 
+import asyncio
 import base64
+import json
 import os
+import random
 import re
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from readability import Document
+from sqlmodel import Session, select
 
+from app.cache import DiskCache
 from app.config import settings
-from app.models import Article
+from app.database import engine
+from app.models import Article, SourceState
+from app.workers import run_in_pool
 
 from .base import BaseIngestor
 
 SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 
 
+def extract_content(body_html: str) -> Tuple[str, str, str]:
+    """
+    Extract the readable content of a newsletter (runs in the worker pool)
+
+    Args:
+        body_html: Message HTML body
+
+    Returns:
+        Tuple of (title, summary HTML, short title)
+    """
+    doc = Document(body_html)
+    return doc.title(), doc.summary(), doc.short_title()
+
+
 class GmailIngestor(BaseIngestor):
     """Ingestor for Gmail with specific label"""
 
-    def __init__(self, source_id: int, config: dict):
-        super().__init__(source_id, config)
+    MAX_BATCH_SIZE = 100  # Gmail batch endpoint limit
+    MAX_RETRIES = 5
+    BACKOFF_BASE_SECONDS = 1.0
+
+    def __init__(self, source_id: int, config: dict, **kwargs):
+        super().__init__(source_id, config, **kwargs)
         self.label = config.get("label", settings.gmail_label)
         self.max_results = config.get("max_results", 50)
+        self.batch_size = min(config.get("batch_size", self.MAX_BATCH_SIZE), self.MAX_BATCH_SIZE)
         self.service = None
+        self.label_id: Optional[str] = None
+        self.cache = DiskCache(
+            os.path.join(settings.cache_dir, "gmail"), settings.gmail_cache_max_bytes
+        )
 
     def _get_credentials(self) -> Credentials:
         """Get or refresh Gmail API credentials"""
@@ -68,53 +99,325 @@ class GmailIngestor(BaseIngestor):
             List of Article objects
         """
         try:
-            # Initialize Gmail service
+            # Initialize Gmail service (credential refresh and discovery are blocking)
             if not self.service:
-                creds = self._get_credentials()
-                self.service = build("gmail", "v1", credentials=creds)
-
-            # Convert datetime to Gmail query format
-            after_date = since.strftime("%Y/%m/%d")
-            query = f"label:{self.label} after:{after_date}"
+                self.service = await asyncio.to_thread(self._build_service)
+
+            # Only pull messages added since the last run; fall back to a full listing
+            # on the first run or once Gmail has expired our history cursor
+            cursor = self._load_cursor()
+            message_ids, history_id = None, None
+            if cursor:
+                message_ids, history_id = await self._list_new_message_ids(cursor)
+            if message_ids is None:
+                message_ids, history_id = await self._list_message_ids(since)
+
+            # Reuse extractions cached by earlier runs; only download the other messages
+            extracted: Dict[str, dict] = {}
+            for message_id in message_ids:
+                cached = self.cache.get(self._cache_key(message_id))
+                if cached is not None:
+                    extracted[message_id] = cached
+            missing_ids = [message_id for message_id in message_ids if message_id not in extracted]
+
+            # Download bodies through the batch endpoint, then extract them concurrently
+            messages, retry_later = await self._fetch_messages(missing_ids)
+            fetched_ids = [message_id for message_id in missing_ids if message_id in messages]
+            for message_id in fetched_ids:
+                await self._archive_payload(
+                    "gmail_message", message_id, json.dumps(messages[message_id]).encode("utf-8")
+                )
 
-            # Get messages
-            results = (
-                self.service.users()
-                .messages()
-                .list(userId="me", q=query, maxResults=self.max_results)
-                .execute()
+            results = await asyncio.gather(
+                *(self._extract_message(messages[message_id]) for message_id in fetched_ids),
+                return_exceptions=True,
             )
 
-            messages = results.get("messages", [])
-            articles = []
-
-            for msg in messages:
-                try:
-                    article = await self._process_message(msg["id"])
-                    if article:
-                        articles.append(article)
-                except Exception as e:
-                    print(f"Error processing message {msg['id']}: {e}")
+            for message_id, result in zip(fetched_ids, results):
+                if isinstance(result, Exception):
+                    print(f"Error processing message {message_id}: {result}")
                     continue
+                self.cache.set(self._cache_key(message_id), result)
+                extracted[message_id] = result
+
+            # Messages without an HTML body are cached as empty extractions, and
+            # messages already stored by an earlier run are skipped
+            articles = [
+                article
+                for article in (
+                    self._article_from_extracted(message_id, extracted[message_id])
+                    for message_id in message_ids
+                    if extracted.get(message_id)
+                )
+                if not self._is_known(article.url)
+            ]
+
+            # Keep the old cursor while some messages hit transient errors, so they are retried;
+            # permanent failures (e.g. deleted messages) must not hold the cursor back forever
+            if not retry_later:
+                self._save_cursor(history_id)
 
             return articles
 
         except FileNotFoundError as e:
-            print(f"Gmail credentials not found: {e}")
+            self._record_error(f"Gmail credentials not found: {e}")
             return []
         except Exception as e:
-            print(f"Error fetching from Gmail: {e}")
+            self._record_error(f"Error fetching from Gmail: {e}")
             return []
 
-    async def _process_message(self, message_id: str) -> Article:
-        """Process a single Gmail message"""
-        msg = (
-            self.service.users()
-            .messages()
-            .get(userId="me", id=message_id, format="full")
-            .execute()
+    async def replay_articles(self, since: datetime, until: datetime) -> List[Article]:
+        """
+        Rebuild articles from archived message resources
+
+        Args:
+            since: Only use messages fetched after this datetime
+            until: Only use messages fetched before this datetime (naive UTC)
+
+        Returns:
+            List of Article objects
+        """
+        articles = []
+        payloads = self.archive.payloads(
+            "gmail_message", self._naive_utc(since), until, source_id=self.source_id
+        )
+        for payload in payloads:
+            body = self.archive.load(payload.digest)
+            if body is None:
+                continue
+            try:
+                extracted = await self._extract_message(json.loads(body))
+            except Exception as e:
+                print(f"Error replaying message {payload.locator}: {e}")
+                continue
+            if extracted:
+                articles.append(self._article_from_extracted(payload.locator, extracted))
+
+        return articles
+
+    async def _list_message_ids(self, since: datetime) -> Tuple[List[str], str]:
+        """
+        List message IDs with the label received after the given date
+
+        Args:
+            since: Fetch emails after this datetime
+
+        Returns:
+            Tuple of (message IDs, historyId to resume from next time)
+        """
+        # Read the history cursor first so nothing arriving during the listing is missed
+        profile = await asyncio.to_thread(
+            self.service.users().getProfile(userId="me").execute, num_retries=self.MAX_RETRIES
+        )
+
+        # Convert datetime to Gmail query format
+        after_date = since.strftime("%Y/%m/%d")
+        query = f"label:{self.label} after:{after_date}"
+
+        # Get message IDs (googleapiclient retries 429/5xx with backoff itself)
+        request = (
+            self.service.users().messages().list(userId="me", q=query, maxResults=self.max_results)
         )
+        results = await asyncio.to_thread(request.execute, num_retries=self.MAX_RETRIES)
 
+        return [msg["id"] for msg in results.get("messages", [])], profile["historyId"]
+
+    async def _list_new_message_ids(
+        self, start_history_id: str
+    ) -> Tuple[Optional[List[str]], Optional[str]]:
+        """
+        List IDs of messages that got the label since the given historyId
+
+        Args:
+            start_history_id: historyId saved by the previous run
+
+        Returns:
+            Tuple of (message IDs, latest historyId), or (None, None) if history expired
+        """
+        label_id = await self._get_label_id()
+        if not label_id:
+            return None, None
+
+        message_ids: List[str] = []
+        history_id = start_history_id
+        page_token = None
+
+        while True:
+            request = (
+                self.service.users()
+                .history()
+                .list(
+                    userId="me",
+                    startHistoryId=start_history_id,
+                    labelId=label_id,
+                    historyTypes=["messageAdded", "labelAdded"],
+                    pageToken=page_token,
+                )
+            )
+            try:
+                results = await asyncio.to_thread(request.execute, num_retries=self.MAX_RETRIES)
+            except HttpError as e:
+                if e.resp.status == 404:
+                    print("Gmail history expired, falling back to a full sync")
+                    return None, None
+                raise
+
+            for record in results.get("history", []):
+                for added in record.get("messagesAdded", []) + record.get("labelsAdded", []):
+                    message = added["message"]
+                    if label_id in message.get("labelIds", [label_id]):
+                        message_ids.append(message["id"])
+
+            history_id = results.get("historyId", history_id)
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                break
+
+        # A message can appear in several history records
+        return list(dict.fromkeys(message_ids)), history_id
+
+    async def _get_label_id(self) -> Optional[str]:
+        """Resolve the configured label name to its Gmail label ID"""
+        if self.label_id is None:
+            results = await asyncio.to_thread(
+                self.service.users().labels().list(userId="me").execute,
+                num_retries=self.MAX_RETRIES,
+            )
+            for label in results.get("labels", []):
+                if label["name"] == self.label:
+                    self.label_id = label["id"]
+                    break
+            else:
+                print(f"Gmail label not found: {self.label}")
+
+        return self.label_id
+
+    def _load_cursor(self) -> Optional[str]:
+        """Load the historyId saved by the previous run"""
+        with Session(engine) as session:
+            state = session.exec(
+                select(SourceState).where(SourceState.source_id == self.source_id)
+            ).first()
+            return state.cursor if state else None
+
+    def _save_cursor(self, history_id: Optional[str]):
+        """Save the historyId to resume from on the next run"""
+        if not history_id or self.source_id is None:
+            return
+
+        with Session(engine) as session:
+            state = session.exec(
+                select(SourceState).where(SourceState.source_id == self.source_id)
+            ).first()
+            if not state:
+                state = SourceState(source_id=self.source_id)
+
+            state.cursor = str(history_id)
+            state.updated_at = datetime.utcnow()
+
+            session.add(state)
+            session.commit()
+
+    def _build_service(self):
+        """Build the Gmail API client (blocking, runs off the event loop)"""
+        creds = self._get_credentials()
+        return build("gmail", "v1", credentials=creds, cache_discovery=False)
+
+    async def _fetch_messages(self, message_ids: List[str]) -> Tuple[Dict[str, dict], List[str]]:
+        """
+        Fetch full messages using batch requests, retrying throttled ones with backoff
+
+        Args:
+            message_ids: Gmail message IDs
+
+        Returns:
+            Tuple of (dict mapping message ID to message resource, IDs that still failed
+            with transient errors after all retries). Messages that failed permanently,
+            e.g. deleted ones, are in neither.
+        """
+        messages: Dict[str, dict] = {}
+        pending = list(message_ids)
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            if not pending:
+                break
+
+            if attempt:
+                delay = self.BACKOFF_BASE_SECONDS * 2 ** (attempt - 1) + random.uniform(0, 1)
+                print(f"Gmail quota hit for {len(pending)} messages, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+            retry = []
+            for i in range(0, len(pending), self.batch_size):
+                chunk = pending[i : i + self.batch_size]
+                retry.extend(await asyncio.to_thread(self._execute_batch, chunk, messages))
+            pending = retry
+
+        if pending:
+            print(f"Giving up on {len(pending)} Gmail messages after {self.MAX_RETRIES} retries")
+
+        return messages, pending
+
+    def _execute_batch(self, message_ids: List[str], messages: Dict[str, dict]) -> List[str]:
+        """
+        Fetch one batch of messages in a single HTTP request (blocking)
+
+        Args:
+            message_ids: Up to MAX_BATCH_SIZE message IDs
+            messages: Dict to store fetched messages into
+
+        Returns:
+            IDs that should be retried
+        """
+        retry = []
+
+        def callback(request_id: str, response: dict, exception: Exception):
+            if exception is None:
+                messages[request_id] = response
+            elif self._is_retryable(exception):
+                retry.append(request_id)
+            else:
+                print(f"Error fetching message {request_id}: {exception}")
+
+        batch = self.service.new_batch_http_request(callback=callback)
+        for message_id in message_ids:
+            batch.add(
+                self.service.users().messages().get(userId="me", id=message_id, format="full"),
+                request_id=message_id,
+            )
+
+        try:
+            batch.execute()
+        except HttpError as e:
+            if not self._is_retryable(e):
+                raise
+            return list(message_ids)
+
+        return retry
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Whether a Gmail API error is a quota/transient error worth retrying"""
+        if not isinstance(error, HttpError):
+            return False
+
+        status = error.resp.status
+        if status == 429 or status >= 500:
+            return True
+
+        reason = getattr(error, "reason", None) or ""
+        return status == 403 and "rate limit" in reason.lower()
+
+    async def _extract_message(self, msg: dict) -> dict:
+        """
+        Extract title, links and text from a Gmail message resource
+
+        Args:
+            msg: Message resource in "full" format
+
+        Returns:
+            Cacheable dict of extracted fields, empty if the message has no HTML body
+        """
         # Extract headers
         headers = {h["name"]: h["value"] for h in msg["payload"]["headers"]}
         subject = headers.get("Subject", "No Subject")
@@ -132,29 +435,38 @@ class GmailIngestor(BaseIngestor):
         body_html = self._get_message_body(msg["payload"])
 
         if not body_html:
-            return None
+            return {}
 
-        # Use readability to extract main content and links
-        doc = Document(body_html)
-        title = doc.title() or subject
-        summary = doc.summary()
+        # Use readability (in the worker pool) to extract main content and links
+        doc_title, summary, short_title = await run_in_pool(extract_content, body_html)
 
-        # Extract links from content
-        links = self._extract_links(summary)
+        return {
+            "title": doc_title or subject,
+            "published_at": published_at.isoformat(),
+            "links": self._extract_links(summary),
+            "summary": short_title,
+            "text": summary[:5000],  # Limit text size
+        }
 
+    def _article_from_extracted(self, message_id: str, extracted: dict) -> Article:
+        """Build an Article from extracted (possibly cached) message fields"""
         # For newsletters, we might want to extract multiple articles
         # For now, we'll create one article per email with the main link
+        links = extracted["links"]
         main_url = links[0] if links else f"gmail:{message_id}"
 
-        article = self._create_article(
-            title=title,
+        return self._create_article(
+            title=extracted["title"],
             url=main_url,
-            published_at=published_at,
-            summary=doc.short_title(),
-            text=summary[:5000],  # Limit text size
+            published_at=datetime.fromisoformat(extracted["published_at"]),
+            summary=extracted["summary"],
+            text=extracted["text"],
         )
 
-        return article
+    @staticmethod
+    def _cache_key(message_id: str) -> str:
+        """Cache key for a message's extracted fields"""
+        return f"gmail:{message_id}"
 
     def _get_message_body(self, payload: dict) -> str:
         """Extract HTML body from Gmail message payload"""
@@ -188,8 +500,7 @@ class GmailIngestor(BaseIngestor):
             url
             for url in urls
             if not any(
-                x in url.lower()
-                for x in ["unsubscribe", "pixel", "track", "beacon", "analytics"]
+                x in url.lower() for x in ["unsubscribe", "pixel", "track", "beacon", "analytics"]
             )
         ]
         return urls[:10]  # Limit to first 10 links
@@ -0,0 +1,67 @@
+"""Registry mapping source types to ingestor classes, imported on first use"""
+
+import importlib
+from typing import Dict, Optional, Type, Union
+
+from .base import BaseIngestor
+
+# Built-in source types, as "module:Class" so heavy dependencies (the Google
+# API client for Gmail, feedparser for RSS) load only when a source needs them
+_registry: Dict[str, Union[str, Type[BaseIngestor]]] = {
+    "gmail": "ingestors.gmail_enterprise:GmailIngestor",
+    "rss": "ingestors.rss:RSSIngestor",
+    "reuters": "ingestors.reuters:ReutersIngestor",
+}
+
+
+def register_ingestor(source_type: str, target: Union[str, Type[BaseIngestor]]) -> None:
+    """
+    Register an ingestor for a source type
+
+    Args:
+        source_type: Value of Source.type handled by the ingestor
+        target: Ingestor class, or a "module:Class" path imported on first use
+    """
+    _registry[source_type] = target
+
+
+def registered_types() -> list:
+    """Source types that have an ingestor registered"""
+    return sorted(_registry)
+
+
+def get_ingestor_class(source_type: str) -> Optional[Type[BaseIngestor]]:
+    """
+    Resolve the ingestor class for a source type, importing its module if needed
+
+    Args:
+        source_type: Value of Source.type
+
+    Returns:
+        Ingestor class, or None if the type is not registered
+    """
+    target = _registry.get(source_type)
+    if target is None or isinstance(target, type):
+        return target
+
+    module_name, _, class_name = target.partition(":")
+    ingestor_class = getattr(importlib.import_module(module_name), class_name)
+    _registry[source_type] = ingestor_class
+    return ingestor_class
+
+
+def create_ingestor(source, **kwargs) -> Optional[BaseIngestor]:
+    """
+    Instantiate the registered ingestor for a source
+
+    Args:
+        source: Source row to ingest from
+        **kwargs: Shared dependencies passed to the ingestor (client, flights)
+
+    Returns:
+        Ingestor instance, or None if the source type is not registered
+    """
+    ingestor_class = get_ingestor_class(source.type)
+    if ingestor_class is None:
+        return None
+    return ingestor_class(source.id, source.config, **kwargs)
@@ -1,26 +1,51 @@
 """Generic RSS/Atom feed ingestor"""
 
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
 import feedparser
 import httpx
 from dateutil import parser as date_parser
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
 
-from app.models import Article
+from app.config import settings
+from app.database import engine
+from app.http_client import shared_client
+from app.models import Article, FeedState
+from app.websub import discover_hub, record_hub
+from app.workers import run_in_pool
 
 from .base import BaseIngestor
+from .feed_stream import FeedCutoffScanner
+
+
+def parse_feed(body: bytes) -> feedparser.FeedParserDict:
+    """
+    Parse a feed document (runs in the worker pool)
+
+    Args:
+        body: Raw feed bytes
+
+    Returns:
+        Parsed feed, with any parse exception replaced by its message so it pickles
+    """
+    feed = feedparser.parse(body)
+    if feed.get("bozo_exception") is not None:
+        feed["bozo_exception"] = str(feed["bozo_exception"])
+    return feed
 
 
 class RSSIngestor(BaseIngestor):
     """Generic RSS/Atom feed ingestor with caching support"""
 
-    def __init__(self, source_id: int, config: dict):
-        super().__init__(source_id, config)
+    def __init__(self, source_id: int, config: dict, **kwargs):
+        super().__init__(source_id, config, **kwargs)
         self.feed_url = config.get("url")
         self.etag: Optional[str] = None
         self.last_modified: Optional[str] = None
+        self.max_bytes = config.get("max_bytes", settings.rss_max_bytes)
 
     async def fetch_articles(self, since: datetime) -> List[Article]:
         """
@@ -37,86 +62,258 @@ class RSSIngestor(BaseIngestor):
             return []
 
         try:
-            # Fetch feed with caching headers
-            headers = {}
-            if self.etag:
-                headers["If-None-Match"] = self.etag
-            if self.last_modified:
-                headers["If-Modified-Since"] = self.last_modified
+            # Sources sharing this feed URL reuse one download and parse per run
+            loaded = await self._coalesce(self.feed_url, lambda: self._load_feed(since))
 
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                response = await client.get(self.feed_url, headers=headers)
+            # Not modified: nothing to download or parse, everything is already stored
+            if loaded is None:
+                return []
+            feed, validators = loaded
 
-                # Check if not modified
-                if response.status_code == 304:
-                    return []
-
-                # Update caching headers
-                self.etag = response.headers.get("ETag")
-                self.last_modified = response.headers.get("Last-Modified")
+            # Feeds advertising a WebSub hub get subscribed so updates are pushed to us
+            if self.config.get("websub", True) and settings.websub_callback_base_url:
+                hub_url, topic_url = discover_hub(feed)
+                if hub_url:
+                    record_hub(self.source_id, hub_url, topic_url or self.feed_url)
 
-                # Parse feed
-                feed = feedparser.parse(response.text)
+            articles = self._articles_from_feed(feed, since)
 
-                if feed.bozo:  # Feed has errors
-                    print(
-                        f"Feed parsing error for {self.feed_url}: {feed.get('bozo_exception')}"
-                    )
+            # Saved by the consumer, not the shared download: a download that outlives a
+            # timed-out consumer must not let later runs skip entries nobody turned into articles
+            if validators:
+                self.etag, self.last_modified = validators
+                self._save_validators()
 
-                articles = []
+            return articles
 
-                for entry in feed.entries:
-                    try:
-                        # Parse publication date
-                        published_at = self._parse_date(entry)
+        except httpx.TimeoutException:
+            self._record_error(f"Timeout fetching RSS feed: {self.feed_url}")
+            return []
+        except httpx.HTTPError as e:
+            self._record_error(f"HTTP error fetching RSS feed {self.feed_url}: {e}")
+            return []
+        except Exception as e:
+            self._record_error(f"Error fetching RSS feed {self.feed_url}: {e}")
+            return []
 
-                        # Skip if too old
-                        if published_at and published_at < since.replace(tzinfo=timezone.utc):
-                            continue
+    async def parse_articles(self, body: bytes, since: datetime) -> List[Article]:
+        """
+        Build articles from a feed document obtained elsewhere (e.g. a WebSub push)
 
-                        # Extract URL
-                        url = entry.get("link", "")
-                        if not url:
-                            continue
+        Args:
+            body: Raw feed bytes
+            since: Skip entries published before this datetime
 
-                        # Make URL absolute
-                        url = self._normalize_url(url, self.feed_url)
+        Returns:
+            List of Article objects
+        """
+        feed = await run_in_pool(parse_feed, body)
+        return self._articles_from_feed(feed, since)
 
-                        # Extract title
-                        title = entry.get("title", "No Title")
+    async def receive_pushed(self, body: bytes, since: datetime) -> List[Article]:
+        """
+        Build articles from a feed document pushed by a WebSub hub, archiving it first
 
-                        # Extract summary
-                        summary = entry.get("summary", entry.get("description", ""))
+        Pushed bodies are archived under the feed URL like fetched ones, so replay sees
+        every update whether it was polled or pushed.
 
-                        # Create article
-                        article = self._create_article(
-                            title=title,
-                            url=url,
-                            published_at=published_at or datetime.now(timezone.utc),
-                            summary=summary[:1000],  # Limit summary size
-                            text=entry.get("content", [{}])[0].get("value", "")[:5000]
-                            if entry.get("content")
-                            else "",
-                        )
+        Args:
+            body: Feed content delivered by the hub
+            since: Skip entries published before this datetime
 
-                        articles.append(article)
+        Returns:
+            List of Article objects
+        """
+        if self.feed_url:
+            await self._archive_payload("feed", self.feed_url, body)
+        return await self.parse_articles(body, since)
 
-                    except Exception as e:
-                        print(f"Error processing RSS entry: {e}")
-                        continue
+    async def replay_articles(self, since: datetime, until: datetime) -> List[Article]:
+        """
+        Rebuild articles from archived bodies of this feed
 
-                return articles
+        Args:
+            since: Skip entries published before this datetime
+            until: Only use bodies fetched before this datetime (naive UTC)
 
-        except httpx.TimeoutException:
-            print(f"Timeout fetching RSS feed: {self.feed_url}")
-            return []
-        except httpx.HTTPError as e:
-            print(f"HTTP error fetching RSS feed {self.feed_url}: {e}")
-            return []
-        except Exception as e:
-            print(f"Error fetching RSS feed {self.feed_url}: {e}")
+        Returns:
+            List of Article objects
+        """
+        if not self.feed_url:
             return []
 
+        start = self._naive_utc(since)
+        articles = []
+        for payload in self.archive.payloads("feed", start, until, locator=self.feed_url):
+            body = self.archive.load(payload.digest)
+            if body is not None:
+                articles.extend(await self.parse_articles(body, since))
+
+        return articles
+
+    def _articles_from_feed(
+        self, feed: feedparser.FeedParserDict, since: datetime
+    ) -> List[Article]:
+        """Convert parsed feed entries published since the given datetime to Articles"""
+        articles = []
+
+        for entry in feed.entries:
+            try:
+                # Parse publication date
+                published_at = self._parse_date(entry)
+
+                # Skip if too old
+                if published_at and published_at < since.replace(tzinfo=timezone.utc):
+                    continue
+
+                # Extract URL
+                url = entry.get("link", "")
+                if not url:
+                    continue
+
+                # Make URL absolute
+                url = self._normalize_url(url, self.feed_url)
+
+                # Stored by an earlier run: skip before building (and resolving) it again
+                if self._is_known(url):
+                    continue
+
+                # Extract title
+                title = entry.get("title", "No Title")
+
+                # Extract summary
+                summary = entry.get("summary", entry.get("description", ""))
+
+                # Create article
+                article = self._create_article(
+                    title=title,
+                    url=url,
+                    published_at=published_at or datetime.now(timezone.utc),
+                    summary=summary[:1000],  # Limit summary size
+                    text=(
+                        entry.get("content", [{}])[0].get("value", "")[:5000]
+                        if entry.get("content")
+                        else ""
+                    ),
+                )
+
+                articles.append(article)
+
+            except Exception as e:
+                print(f"Error processing RSS entry: {e}")
+                continue
+
+        return articles
+
+    async def _load_feed(
+        self, since: datetime
+    ) -> Optional[Tuple[feedparser.FeedParserDict, Optional[Tuple[str, str]]]]:
+        """
+        Download and parse the feed
+
+        Args:
+            since: Entries older than this are not needed
+
+        Returns:
+            Tuple of (parsed feed, (ETag, Last-Modified) to save once its entries are
+            ingested, or None if they must not be saved), or None if the server reports
+            the feed has not changed
+        """
+        # Fetch feed with caching headers persisted by previous runs
+        self._load_validators()
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        async with shared_client(self.client) as client:
+            async with client.stream("GET", self.feed_url, headers=headers) as response:
+                if response.status_code == 304:
+                    return None
+
+                response.raise_for_status()
+
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+
+                body, truncated = await self._read_body(response, since)
+
+        await self._archive_payload("feed", self.feed_url, body)
+
+        # Parse feed in the worker pool so other fetches and API requests keep running
+        feed = await run_in_pool(parse_feed, body)
+
+        # A feed we cut short is expected to be malformed at the end
+        if feed.bozo and not truncated:
+            print(f"Feed parsing error for {self.feed_url}: {feed.get('bozo_exception')}")
+            if not feed.entries:
+                return feed, None
+
+        # Only a body that was read and parsed may be skipped as not modified later
+        return feed, (etag, last_modified)
+
+    async def _read_body(self, response: httpx.Response, since: datetime) -> Tuple[bytes, bool]:
+        """
+        Stream the feed body within the byte budget, stopping early at old entries
+
+        Args:
+            response: Streaming response
+            since: Entries older than this are not needed
+
+        Returns:
+            Tuple of (body bytes, whether the download was cut short)
+        """
+        scanner = FeedCutoffScanner(since, streak=settings.rss_cutoff_streak)
+        chunks = []
+        size = 0
+
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+
+            if scanner.feed(chunk):
+                return b"".join(chunks), True
+
+            if size >= self.max_bytes:
+                print(f"Feed {self.feed_url} exceeded {self.max_bytes} bytes, truncating")
+                return b"".join(chunks)[: self.max_bytes], True
+
+        return b"".join(chunks), False
+
+    def _load_validators(self):
+        """Load ETag/Last-Modified stored for this feed URL by a previous run"""
+        if self.etag or self.last_modified:
+            return
+
+        with Session(engine) as session:
+            state = session.exec(select(FeedState).where(FeedState.url == self.feed_url)).first()
+            if state:
+                self.etag = state.etag
+                self.last_modified = state.last_modified
+
+    def _save_validators(self):
+        """Persist ETag/Last-Modified for this feed URL so later runs can send them"""
+        # Two sources may share a feed URL and race to create the row; retry as an update
+        for _ in range(2):
+            with Session(engine) as session:
+                state = session.exec(
+                    select(FeedState).where(FeedState.url == self.feed_url)
+                ).first()
+                if not state:
+                    state = FeedState(url=self.feed_url)
+
+                state.etag = self.etag
+                state.last_modified = self.last_modified
+                state.updated_at = datetime.utcnow()
+
+                session.add(state)
+                try:
+                    session.commit()
+                    return
+                except IntegrityError:
+                    session.rollback()
+
     def _parse_date(self, entry: dict) -> Optional[datetime]:
         """Parse publication date from RSS entry"""
         # Try different date fields
@@ -0,0 +1,27 @@
+"""Shared test fixtures"""
+
+import os
+import tempfile
+
+# Point the app at a throwaway database and cache before any app module reads settings
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmp_dir, "test.db")
+os.environ["CACHE_DIR"] = os.path.join(_tmp_dir, "cache")
+
+import pytest  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+
+@pytest.fixture
+def database():
+    """Create all tables for a test and drop them afterwards"""
+    import app.models  # noqa: F401  (registers the tables)
+    from app import known_urls
+    from app.database import engine
+
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    SQLModel.metadata.drop_all(engine)
+    # Derived from the dropped articles table
+    known_urls.reset()
+    known_urls._path().unlink(missing_ok=True)
@@ -0,0 +1,62 @@
+"""Tests for the on-disk cache"""
+
+import os
+import time
+
+import pytest
+
+from app.cache import DiskCache
+from app.config import settings
+from app.processors.classifier import ArticleClassifier
+from app.processors.normalizer import ArticleNormalizer
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path / "cache"), max_bytes=1000)
+
+
+def test_roundtrip(cache):
+    """Test storing and reading back a value"""
+    cache.set("gmail:abc", {"title": "Hello", "links": ["https://example.com"]})
+    assert cache.get("gmail:abc") == {"title": "Hello", "links": ["https://example.com"]}
+
+
+def test_miss(cache):
+    """Test that unknown keys miss"""
+    assert cache.get("gmail:missing") is None
+
+
+def test_overwrite_keeps_size_accurate(cache):
+    """Test that rewriting a key does not double count its size"""
+    cache.set("key", "x" * 100)
+    cache.set("key", "x" * 100)
+    assert cache.size() == len('"' + "x" * 100 + '"')
+
+
+def test_evicts_least_recently_used(cache):
+    """Test that the oldest unused entries are evicted once over budget"""
+    for i in range(4):
+        cache.set(f"key{i}", "x" * 200)
+        path = cache._path(f"key{i}")
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+
+    # Reading key0 makes it the most recently used
+    assert cache.get("key0") is not None
+
+    cache.set("key4", "x" * 200)
+
+    assert cache.size() <= 1000
+    assert cache.get("key0") is not None
+    assert cache.get("key4") is not None
+    assert cache.get("key1") is None
+
+
+def test_processing_caches_are_separate():
+    """Test that each stage's processing cache has its own directory and half the budget"""
+    normalize = ArticleNormalizer().processing_cache
+    classify = ArticleClassifier().processing_cache
+
+    assert normalize.directory.parent == classify.directory.parent
+    assert normalize.directory != classify.directory
+    assert normalize.max_bytes + classify.max_bytes <= settings.processing_cache_max_bytes
@@ -0,0 +1,69 @@
+"""Tests for the rule-based URL canonicalizer"""
+
+import pytest
+
+from app.processors.canonicalizer import UrlCanonicalizer, load_canonical_rules
+
+RULES = {
+    "tracking_params": ["fbclid", "ref"],
+    "tracking_prefixes": ["utm_"],
+    "domains": {
+        "publisher.com": {"desktop_host": "www.publisher.com", "resolve": False},
+        "strict.com": {"keep_params": ["id"], "resolve": False},
+    },
+}
+
+
+@pytest.fixture
+def canonicalizer():
+    return UrlCanonicalizer(RULES)
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("HTTPS://Example.COM:443/Story", "https://example.com/Story"),
+        ("http://example.com:80/a", "http://example.com/a"),
+        ("https://example.com:8443/a", "https://example.com:8443/a"),
+        ("https://example.com/a?b=2&a=1#comments", "https://example.com/a?a=1&b=2"),
+        (
+            "https://example.com/a?utm_source=x&utm_medium=y&id=3&fbclid=z",
+            "https://example.com/a?id=3",
+        ),
+        ("https://example.com/news/amp/story-1", "https://example.com/news/story-1"),
+        ("https://example.com/news/story-1/amp", "https://example.com/news/story-1"),
+        ("https://example.com/news/story-1.amp.html", "https://example.com/news/story-1.html"),
+        ("https://example.com/story?output=amp", "https://example.com/story"),
+        ("https://example.com/section/index.html", "https://example.com/section/"),
+        ("https://m.example.com/story", "https://example.com/story"),
+        ("https://m.publisher.com/story", "https://www.publisher.com/story"),
+        ("https://strict.com/article?id=7&page=2", "https://strict.com/article?id=7"),
+    ],
+)
+def test_canonicalize(canonicalizer, url, expected):
+    assert canonicalizer.canonicalize(url).url == expected
+
+
+def test_domain_rules_decide_resolution(canonicalizer):
+    """Test that only domains without decisive rules are left to a page fetch"""
+    assert canonicalizer.canonicalize("https://www.publisher.com/a").resolve is False
+    assert canonicalizer.canonicalize("https://news.publisher.com/a").resolve is False
+    assert canonicalizer.canonicalize("https://unknown.org/a").resolve is True
+
+
+def test_pseudo_urls_are_untouched(canonicalizer):
+    result = canonicalizer.canonicalize("gmail:18c2f")
+
+    assert result.url == "gmail:18c2f"
+    assert result.resolve is False
+
+
+def test_shipped_rules_load():
+    """Test that the rules file in the repo parses and covers the configured feeds"""
+    canonicalizer = UrlCanonicalizer(load_canonical_rules())
+
+    result = canonicalizer.canonicalize(
+        "https://www.reuters.com/world/middle-east/story-2024/?utm_source=rss"
+    )
+    assert result.url == "https://www.reuters.com/world/middle-east/story-2024/"
+    assert result.resolve is False
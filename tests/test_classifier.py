@@ -4,13 +4,17 @@ from datetime import datetime
 
 import pytest
 
+from app.cache import DiskCache
 from app.models import Article, RegionTag, SectionTag
 from app.processors.classifier import ArticleClassifier
+from app.processors.keywords import compile_keyword_tables
 
 
 @pytest.fixture
-def classifier():
-    return ArticleClassifier()
+def classifier(tmp_path):
+    classifier = ArticleClassifier()
+    classifier.processing_cache = DiskCache(str(tmp_path / "processed"), max_bytes=100_000)
+    return classifier
 
 
 def test_classify_egypt(classifier):
@@ -95,3 +99,37 @@ def test_classify_general_default(classifier):
 
     result = classifier.classify(article)
     assert result.section_tag == SectionTag.GENERAL.value
+
+
+def test_batch_uses_processing_cache(classifier, monkeypatch):
+    """Test that text classified before is not classified again"""
+    classified = []
+    classify = classifier.classify
+
+    def counting_classify(article, tables=None):
+        classified.append(article.title)
+        return classify(article, tables)
+
+    monkeypatch.setattr(classifier, "classify", counting_classify)
+
+    def batch():
+        article = Article(
+            title="Dubai port volumes rise",
+            url="https://example.com/article",
+            published_at=datetime.utcnow(),
+            content_hash="test",
+        )
+        return classifier.classify_batch([article])[0]
+
+    first, second = batch(), batch()
+
+    assert (second.region_tag, second.section_tag) == (first.region_tag, first.section_tag)
+    assert (second.region_tag, second.section_tag) == ("UAE", "LOGISTICS_SHIPPING")
+    assert len(classified) == 1
+
+    # New keyword tables mean a different version, so the text is classified again
+    tables = compile_keyword_tables({"regions": {"KSA": ["dubai"]}}, version="edited")
+    monkeypatch.setattr("app.processors.classifier.get_keyword_tables", lambda: tables)
+
+    assert batch().region_tag == "KSA"
+    assert len(classified) == 2
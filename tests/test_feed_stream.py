@@ -0,0 +1,90 @@
+"""Tests for streamed feed scanning"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from ingestors.feed_stream import FeedCutoffScanner
+
+NOW = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _rss(ages_hours):
+    """Build an RSS document with one item per age (newest first)"""
+    items = "".join(
+        f"<item><title>Item {i}</title><link>https://example.com/{i}</link>"
+        f"<pubDate>{format_datetime(NOW - timedelta(hours=age))}</pubDate></item>"
+        for i, age in enumerate(ages_hours)
+    )
+    return (
+        '<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>'
+        f"<pubDate>{format_datetime(NOW - timedelta(days=30))}</pubDate>"
+        f"{items}</channel></rss>"
+    ).encode()
+
+
+def _scan(document, since, streak=3, chunk_size=64):
+    """Feed a document in chunks, returning the scanner and bytes consumed at cutoff"""
+    scanner = FeedCutoffScanner(since, streak=streak)
+    for offset in range(0, len(document), chunk_size):
+        if scanner.feed(document[offset : offset + chunk_size]):
+            return scanner, offset + chunk_size
+    return scanner, None
+
+
+@pytest.fixture
+def since():
+    return NOW - timedelta(hours=24)
+
+
+def test_stops_after_streak_of_old_entries(since):
+    """Test that scanning stops once enough consecutive entries are too old"""
+    document = _rss([1, 2, 3] + [48 + i for i in range(50)])
+    scanner, consumed = _scan(document, since)
+
+    assert consumed is not None
+    assert consumed < len(document) / 2
+    assert scanner.entries == 6
+
+
+def test_fresh_feed_is_read_to_the_end(since):
+    """Test that a feed with only recent entries is never cut"""
+    scanner, consumed = _scan(_rss([1, 2, 3, 4, 5]), since)
+
+    assert consumed is None
+    assert scanner.entries == 5
+
+
+def test_interleaved_old_entries_reset_streak(since):
+    """Test that a recent entry resets the run of old entries"""
+    scanner, consumed = _scan(_rss([1, 30, 30, 2, 30, 30, 3]), since)
+    assert consumed is None
+
+
+def test_channel_date_is_not_attributed_to_entries(since):
+    """Test that the channel pubDate does not make undated entries look old"""
+    document = (
+        '<?xml version="1.0"?><rss version="2.0"><channel>'
+        f"<pubDate>{format_datetime(NOW - timedelta(days=30))}</pubDate>"
+        + "<item><title>Undated</title></item>" * 5
+        + "</channel></rss>"
+    ).encode()
+
+    scanner, consumed = _scan(document, since)
+    assert consumed is None
+    assert scanner.entries == 5
+
+
+def test_atom_entries(since):
+    """Test that Atom entries and dates are recognised"""
+    entries = "".join(
+        f"<entry><title>E{i}</title>"
+        f"<updated>{(NOW - timedelta(hours=48 + i)).isoformat()}</updated></entry>"
+        for i in range(10)
+    )
+    document = f'<feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'.encode()
+
+    scanner, consumed = _scan(document, since)
+    assert consumed is not None
+    assert scanner.entries == 3
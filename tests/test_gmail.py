@@ -0,0 +1,216 @@
+"""Tests for the Gmail ingestor's incremental sync"""
+
+import base64
+from datetime import datetime, timedelta
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from sqlmodel import Session
+
+from app.cache import DiskCache
+from app.models import SourceState
+from ingestors.gmail_enterprise import GmailIngestor
+
+LABEL_ID = "Label_7"
+
+
+def http_error(status: int) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+def make_message(message_id: str) -> dict:
+    html = (
+        f"<html><body><p>Newsletter {message_id}</p>"
+        f'<a href="https://news.example.com/{message_id}">Read</a></body></html>'
+    )
+    return {
+        "id": message_id,
+        "payload": {
+            "mimeType": "text/html",
+            "headers": [{"name": "Subject", "value": f"Issue {message_id}"}],
+            "body": {"data": base64.urlsafe_b64encode(html.encode()).decode()},
+        },
+    }
+
+
+class Call:
+    """A prepared API request"""
+
+    def __init__(self, func):
+        self.func = func
+
+    def execute(self, num_retries=0):
+        return self.func()
+
+
+class Batch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.calls = []
+
+    def add(self, call, request_id):
+        self.calls.append((call, request_id))
+
+    def execute(self):
+        for call, request_id in self.calls:
+            try:
+                response, exception = call.execute(), None
+            except HttpError as e:
+                response, exception = None, e
+            self.callback(request_id, response, exception)
+
+
+class FakeGmail:
+    """In-memory stand-in for the Gmail API client"""
+
+    def __init__(self, messages, history_id="500", history=None, failures=None):
+        self.store = {message_id: make_message(message_id) for message_id in messages}
+        self.history_id = history_id
+        self.added = history  # IDs added since the saved cursor (None: history expired)
+        self.failures = failures or {}  # Message ID -> HTTP status
+        self.history_starts = []
+        self.listed = False
+        self.fetched = []
+
+    def users(self):
+        return self
+
+    def getProfile(self, userId):
+        return Call(lambda: {"historyId": self.history_id})
+
+    def labels(self):
+        return self
+
+    def history(self):
+        return HistoryApi(self)
+
+    def messages(self):
+        return MessagesApi(self)
+
+    def list(self, userId):
+        return Call(lambda: {"labels": [{"name": "Enterprise", "id": LABEL_ID}]})
+
+    def new_batch_http_request(self, callback):
+        return Batch(self, callback)
+
+
+class HistoryApi:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, userId, startHistoryId, labelId, historyTypes, pageToken=None):
+        service = self.service
+
+        def execute():
+            service.history_starts.append(startHistoryId)
+            if service.added is None:
+                raise http_error(404)
+            added = [{"message": {"id": i, "labelIds": [LABEL_ID]}} for i in service.added]
+            return {"history": [{"messagesAdded": added}], "historyId": service.history_id}
+
+        return Call(execute)
+
+
+class MessagesApi:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, userId, q, maxResults):
+        service = self.service
+
+        def execute():
+            service.listed = True
+            return {"messages": [{"id": message_id} for message_id in service.store]}
+
+        return Call(execute)
+
+    def get(self, userId, id, format):
+        service = self.service
+
+        def execute():
+            service.fetched.append(id)
+            if id in service.failures:
+                raise http_error(service.failures[id])
+            return service.store[id]
+
+        return Call(execute)
+
+
+@pytest.fixture
+def make_ingestor(database, tmp_path):
+    def make(service, cursor=None):
+        if cursor:
+            with Session(database) as session:
+                session.add(SourceState(source_id=1, cursor=cursor))
+                session.commit()
+
+        ingestor = GmailIngestor(1, {"label": "Enterprise"})
+        ingestor.service = service
+        ingestor.cache = DiskCache(str(tmp_path / "gmail"), max_bytes=1_000_000)
+        return ingestor
+
+    return make
+
+
+def saved_cursor(database):
+    with Session(database) as session:
+        return session.get(SourceState, 1).cursor
+
+
+SINCE = datetime.utcnow() - timedelta(days=1)
+
+
+async def test_history_sync_fetches_only_new_messages(database, make_ingestor):
+    """With a saved cursor only messages added since then are listed and downloaded"""
+    service = FakeGmail(["m1", "m2", "m3"], history_id="600", history=["m3"])
+    ingestor = make_ingestor(service, cursor="500")
+
+    articles = await ingestor.fetch_articles(SINCE)
+
+    assert [a.url for a in articles] == ["https://news.example.com/m3"]
+    assert service.history_starts == ["500"]
+    assert not service.listed
+    assert service.fetched == ["m3"]
+    assert saved_cursor(database) == "600"
+
+
+async def test_expired_history_falls_back_to_full_sync(database, make_ingestor):
+    """A 404 from history.list lists the label again and restarts from the profile historyId"""
+    service = FakeGmail(["m1", "m2"], history_id="900", history=None)
+    ingestor = make_ingestor(service, cursor="100")
+
+    articles = await ingestor.fetch_articles(SINCE)
+
+    assert sorted(a.url for a in articles) == [
+        "https://news.example.com/m1",
+        "https://news.example.com/m2",
+    ]
+    assert service.history_starts == ["100"]
+    assert service.listed
+    assert saved_cursor(database) == "900"
+
+
+async def test_deleted_message_does_not_hold_cursor(database, make_ingestor):
+    """A message that can never be downloaded (404) is dropped and the cursor advances"""
+    service = FakeGmail(["m1", "m2"], history_id="600", history=["m1", "m2"], failures={"m1": 404})
+    ingestor = make_ingestor(service, cursor="500")
+
+    articles = await ingestor.fetch_articles(SINCE)
+
+    assert [a.url for a in articles] == ["https://news.example.com/m2"]
+    assert service.fetched == ["m1", "m2"]  # Not retried
+    assert saved_cursor(database) == "600"
+
+
+async def test_throttled_message_holds_cursor(database, make_ingestor):
+    """A message still throttled after the retries keeps the old cursor so it is retried"""
+    service = FakeGmail(["m1", "m2"], history_id="600", history=["m1", "m2"], failures={"m1": 429})
+    ingestor = make_ingestor(service, cursor="500")
+    ingestor.MAX_RETRIES = 0
+
+    articles = await ingestor.fetch_articles(SINCE)
+
+    assert [a.url for a in articles] == ["https://news.example.com/m2"]
+    assert saved_cursor(database) == "500"
@@ -0,0 +1,70 @@
+"""Tests for per-run fetch coalescing"""
+
+import asyncio
+
+import pytest
+
+from app.http_client import SingleFlight
+
+
+async def test_concurrent_calls_share_one_run():
+    """Concurrent and later callers for a key get the result of a single call"""
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "body"
+
+    results = await asyncio.gather(*(flights.do("feed", fetch) for _ in range(5)))
+
+    assert results == ["body"] * 5
+    assert await flights.do("feed", fetch) == "body"
+    assert len(calls) == 1
+
+
+async def test_keys_run_separately():
+    """Different keys do not share results"""
+    flights = SingleFlight()
+
+    async def fetch(value):
+        return value
+
+    assert await flights.do("a", lambda: fetch(1)) == 1
+    assert await flights.do("b", lambda: fetch(2)) == 2
+
+
+async def test_exception_is_shared():
+    """Every consumer sees the failure of the single call"""
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        raise ValueError("feed is broken")
+
+    results = await asyncio.gather(
+        flights.do("feed", fetch), flights.do("feed", fetch), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["feed is broken"] * 2
+    assert len(calls) == 1
+
+
+async def test_consumer_timeout_does_not_cancel_call():
+    """A consumer giving up leaves the call running for the others"""
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "body"
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(flights.do("feed", fetch), 0.01)
+
+    waiting = asyncio.ensure_future(flights.do("feed", fetch))
+    release.set()
+
+    assert await waiting == "body"
@@ -0,0 +1,104 @@
+"""Tests for the keyword engine and keyword tables"""
+
+import os
+
+import pytest
+
+from app.config import settings
+from app.models import RegionTag, SectionTag
+from app.processors.keywords import KeywordEngine, get_keyword_tables
+
+
+@pytest.fixture
+def engine():
+    return KeywordEngine(
+        {
+            "region": {"egypt": ["egypt", "suez canal"], "uae": ["abu dhabi", "dp world"]},
+            "section": {"shipping": ["port", "suez canal", "canal"]},
+        }
+    )
+
+
+def test_matches_whole_words_only(engine):
+    """A keyword inside a longer word is not a match"""
+    hits = engine.scan("Annual report on airport support")
+    assert hits == {"region": {}, "section": {}}
+
+
+def test_allows_plural(engine):
+    """A trailing s on the text word still matches"""
+    hits = engine.scan("Red Sea ports reopen")
+    assert hits["section"] == {"shipping": {"port"}}
+
+
+def test_matches_phrases_and_overlaps(engine):
+    """Phrases and keywords contained in them are all reported"""
+    hits = engine.scan("Traffic through the Suez Canal recovers; Egypt's revenue rises")
+    assert hits["region"] == {"egypt": {"suez canal", "egypt"}}
+    assert hits["section"] == {"shipping": {"suez canal", "canal"}}
+
+
+def test_phrase_after_partial_match(engine):
+    """Failure links recover a phrase that starts inside a broken one"""
+    hits = engine.scan("Abu DP World expands in Abu Dhabi")
+    assert hits["region"] == {"uae": {"dp world", "abu dhabi"}}
+
+
+def test_overlapping_singular_and_plural_keywords():
+    """A plural text word feeds both a singular keyword and a phrase starting with it"""
+    engine = KeywordEngine({"section": {"shipping": ["port", "ports authority"]}})
+
+    assert engine.scan("The ports authority said")["section"] == {
+        "shipping": {"port", "ports authority"}
+    }
+    assert engine.scan("The port authority said")["section"] == {
+        "shipping": {"port", "ports authority"}
+    }
+    assert engine.scan("Two ports reopened")["section"] == {"shipping": {"port"}}
+
+
+def test_shared_engine_covers_classifier_and_ranker():
+    """One scan returns region, section and boost hits"""
+    hits = get_keyword_tables().engine.scan("Saudi port operator plans IPO")
+    assert RegionTag.KSA in hits["region"]
+    assert SectionTag.LOGISTICS_SHIPPING in hits["section"]
+    assert set(hits["boost"]) == {"port", "ipo"}
+
+
+@pytest.fixture
+def keywords_file(tmp_path, monkeypatch):
+    path = tmp_path / "keywords.yaml"
+    path.write_text("regions:\n  EGYPT: [cairo]\nkeyword_boosts:\n  ipo: 1.5\n")
+    monkeypatch.setattr(settings, "keywords_path", str(path))
+    return path
+
+
+def _touch(path, content):
+    """Rewrite a file and move its mtime forward so the change is always visible"""
+    stat = path.stat()
+    path.write_text(content)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_tables_reload_when_file_changes(keywords_file):
+    """Edits to the YAML file are picked up without a restart"""
+    tables = get_keyword_tables()
+    assert tables.keyword_boosts == {"ipo": 1.5}
+    assert get_keyword_tables() is tables  # Unchanged file, same compiled tables
+
+    _touch(keywords_file, "regions:\n  UAE: [dubai]\nkeyword_boosts:\n  ipo: 2.0\n")
+    reloaded = get_keyword_tables()
+
+    assert reloaded.version != tables.version
+    assert reloaded.keyword_boosts == {"ipo": 2.0}
+    assert RegionTag.UAE in reloaded.engine.scan("Dubai")["region"]
+    assert tables.engine.scan("Cairo")["region"]  # Old snapshot still usable
+
+
+def test_tables_kept_on_invalid_file(keywords_file):
+    """A broken edit leaves the previous tables in place"""
+    tables = get_keyword_tables()
+
+    _touch(keywords_file, "regions:\n  ATLANTIS: [atlantis]\n")
+
+    assert get_keyword_tables() is tables
@@ -0,0 +1,76 @@
+"""Tests for the known-URL Bloom filter"""
+
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlmodel import Session
+
+from app import known_urls
+from app.known_urls import BloomFilter
+from app.models import Article
+from app.processors.deduplicator import url_hash
+from ingestors.rss import RSSIngestor
+
+FEED_URL = "https://publisher.example.com/feed"
+
+
+def test_bloom_filter_membership():
+    """Test that added keys are found and the false positive rate stays near target"""
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"key-{i}")
+
+    assert all(f"key-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_bloom_filter_roundtrip():
+    """Test serializing and loading a filter"""
+    bloom = BloomFilter(100)
+    bloom.add("abc")
+
+    loaded = BloomFilter.from_bytes(bloom.to_bytes())
+
+    assert "abc" in loaded
+    assert loaded.count == 1
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(b"garbage")
+
+
+def test_filter_is_rebuilt_from_articles_table(database):
+    """Test that a missing filter is rebuilt from stored content hashes"""
+    url = "https://publisher.example.com/stored"
+    with Session(database) as session:
+        session.add(
+            Article(
+                title="Stored",
+                url=url,
+                published_at=datetime.utcnow(),
+                content_hash=url_hash(url),
+            )
+        )
+        session.commit()
+
+    assert known_urls.is_known(url + "?utm_source=feed")
+    assert not known_urls.is_known("https://publisher.example.com/new")
+
+
+async def test_known_entries_are_skipped_at_parse_time(database):
+    """Test that entries remembered by an earlier ingest are not turned into articles"""
+    now = datetime.now(timezone.utc)
+    items = "".join(
+        f"<item><title>Story {i}</title><link>https://publisher.example.com/{i}</link>"
+        f"<pubDate>{now:%a, %d %b %Y %H:%M:%S} +0000</pubDate></item>"
+        for i in range(3)
+    )
+    body = f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'
+    known_urls.remember([url_hash("https://publisher.example.com/1")])
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=body))
+    async with httpx.AsyncClient(transport=transport) as client:
+        ingestor = RSSIngestor(1, {"url": FEED_URL, "websub": False}, client=client)
+        articles = await ingestor.fetch_articles(now - timedelta(hours=1))
+
+    assert [article.title for article in articles] == ["Story 0", "Story 2"]
@@ -0,0 +1,227 @@
+"""Tests for the article normalizer"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.cache import DiskCache
+from app.config import settings
+from app.models import Article
+from app.processors import normalizer as normalizer_module
+from app.processors.canonicalizer import UrlCanonicalizer
+from app.processors.normalizer import ArticleNormalizer
+from app.processors.text_cleaner import clean_batch
+
+
+@pytest.fixture
+def normalizer(tmp_path, monkeypatch):
+    normalizer = ArticleNormalizer()
+    normalizer.canonical_cache = DiskCache(str(tmp_path / "canonical"), max_bytes=100_000)
+    normalizer.processing_cache = DiskCache(str(tmp_path / "processed"), max_bytes=100_000)
+    normalizer.fetched = []
+
+    async def fetch_canonical_url(url, client=None):
+        normalizer.fetched.append(url)
+        return normalizer.responses.get(url, "")
+
+    normalizer.responses = {}
+    monkeypatch.setattr(normalizer, "_fetch_canonical_url", fetch_canonical_url)
+    return normalizer
+
+
+async def test_canonical_url_is_cached(normalizer):
+    """Test that a resolved URL is not fetched again"""
+    normalizer.responses["https://example.com/a"] = "https://example.com/story"
+
+    first = await normalizer._resolve_url("https://example.com/a")
+    second = await normalizer._resolve_url("https://example.com/a")
+
+    assert first == second == "https://example.com/story"
+    assert normalizer.fetched == ["https://example.com/a"]
+
+
+async def test_failures_are_cached_until_they_expire(normalizer):
+    """Test negative caching of failed lookups"""
+    assert await normalizer._resolve_url("https://example.com/b") == "https://example.com/b"
+    assert await normalizer._resolve_url("https://example.com/b") == "https://example.com/b"
+    assert len(normalizer.fetched) == 1
+
+    # Expire the cached failure
+    normalizer.canonical_cache.set("https://example.com/b", {"canonical": "", "expires_at": 0})
+    await normalizer._resolve_url("https://example.com/b")
+
+    assert len(normalizer.fetched) == 2
+
+
+async def test_normalize_is_local_only(normalizer):
+    """Test that ingest-time normalization applies the rules without fetching pages"""
+    article = make_article("https://m.example.com/amp/story?utm_source=feed")
+
+    await normalizer.normalize_batch([article])
+
+    assert article.url == "https://example.com/story"
+    assert normalizer.fetched == []
+
+
+async def test_batch_runs_lookups_concurrently_in_order(normalizer, monkeypatch):
+    """Test that a batch overlaps lookups on different domains and keeps input order"""
+    monkeypatch.setattr(normalizer, "_fetch_canonical_url", slow_canonical(0.2))
+    articles = [make_article(f"https://site{i}.example.com/story") for i in range(10)]
+
+    started = time.monotonic()
+    normalized = await normalizer.resolve_canonical_urls(articles)
+
+    assert time.monotonic() - started < 1.0
+    assert [a.url for a in normalized] == [
+        f"https://site{i}.example.com/canonical" for i in range(10)
+    ]
+
+
+async def test_lookups_on_one_domain_are_spaced(normalizer, monkeypatch):
+    """Test the per-domain politeness interval"""
+    monkeypatch.setattr(settings, "normalize_domain_interval_seconds", 0.1)
+    started_at = []
+
+    async def fetch_canonical_url(url, client=None):
+        started_at.append(time.monotonic())
+        return ""
+
+    monkeypatch.setattr(normalizer, "_fetch_canonical_url", fetch_canonical_url)
+    articles = [make_article(f"https://example.com/{i}") for i in range(3)]
+
+    await normalizer.resolve_canonical_urls(articles)
+
+    gaps = [b - a for a, b in zip(started_at, started_at[1:])]
+    assert all(gap >= 0.09 for gap in gaps)
+
+
+async def test_stage_deadline_keeps_cleaned_urls(normalizer, monkeypatch):
+    """Test that lookups still pending at the deadline are abandoned and not cached"""
+    monkeypatch.setattr(settings, "normalize_stage_timeout_seconds", 0.1)
+    monkeypatch.setattr(normalizer, "_fetch_canonical_url", slow_canonical(5))
+
+    normalized = await normalizer.resolve_canonical_urls([make_article("https://example.com/a")])
+
+    assert normalized[0].url == "https://example.com/a"
+    assert normalizer.canonical_cache.get("https://example.com/a") is None
+
+
+async def test_repeated_articles_use_processing_cache(normalizer, monkeypatch):
+    """Test that content normalized before is not cleaned again"""
+    raw = ("<b>Story</b> - SITE", "https://m.example.com/story?utm_source=feed", "<p>Body</p>")
+    cleaned_batches = []
+
+    async def counting_clean_batch(items):
+        cleaned_batches.append(len(items))
+        return await clean_batch(items)
+
+    monkeypatch.setattr(normalizer_module, "clean_batch", counting_clean_batch)
+
+    for _ in range(2):
+        title, url, summary = raw
+        article = Article(title=title, url=url, summary_raw=summary, published_at=datetime.utcnow())
+        await normalizer.normalize_batch([article])
+
+        assert (article.title, article.url, article.summary_raw) == (
+            "Story",
+            "https://example.com/story",
+            "Body",
+        )
+
+    assert cleaned_batches == [1, 0]
+
+    # Different rules mean a different version, so the article is normalized again
+    normalizer.canonicalizer = UrlCanonicalizer({"tracking_params": ["ref"]})
+    article = Article(title=raw[0], url=raw[1], summary_raw=raw[2], published_at=datetime.utcnow())
+    await normalizer.normalize_batch([article])
+
+    assert cleaned_batches == [1, 0, 1]
+
+
+def make_article(url):
+    return Article(title="Story", url=url, published_at=datetime.utcnow(), content_hash="")
+
+
+def slow_canonical(delay):
+    async def fetch_canonical_url(url, client=None):
+        await asyncio.sleep(delay)
+        return url.rsplit("/", 1)[0] + "/canonical"
+
+    return fetch_canonical_url
+
+
+class PageStream(httpx.AsyncByteStream):
+    """Response body served in chunks, recording how much was read"""
+
+    def __init__(self, body: bytes, chunk_size: int = 1024):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.sent = 0
+
+    async def __aiter__(self):
+        for i in range(0, len(self.body), self.chunk_size):
+            self.sent += self.chunk_size
+            yield self.body[i : i + self.chunk_size]
+
+
+async def test_canonical_link_read_from_head_only():
+    """Test that one streamed GET stops at </head> and resolves a relative canonical link"""
+    page = (
+        b"<html><HEAD><title>Story</title>"
+        b'<link rel="canonical" href="/news/story-1"></HEAD><body>'
+        + b"x" * 500_000
+        + b"</body></html>"
+    )
+    stream = PageStream(page)
+    requests = []
+
+    def handler(request):
+        requests.append(request.method)
+        return httpx.Response(200, headers={"content-type": "text/html"}, stream=stream)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        normalizer = ArticleNormalizer(client=client)
+        canonical = await normalizer._fetch_canonical_url("https://example.com/amp/story-1")
+
+    assert canonical == "https://example.com/news/story-1"
+    assert requests == ["GET"]
+    assert stream.sent <= 2048
+
+
+async def test_non_html_returns_final_url():
+    """Test that non-HTML responses resolve to the URL without reading the body"""
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "application/pdf"}, content=b"%PDF")
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        canonical = await ArticleNormalizer(client=client)._fetch_canonical_url(
+            "https://example.com/report.pdf"
+        )
+
+    assert canonical == "https://example.com/report.pdf"
+
+
+async def test_resolve_with_passed_client(tmp_path):
+    """Test that lookups use the client passed in, leaving the normalizer's own untouched"""
+    requests = []
+
+    def handler(request):
+        requests.append(str(request.url))
+        page = b'<html><head><link rel="canonical" href="/canonical"></head></html>'
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=page)
+
+    normalizer = ArticleNormalizer()
+    normalizer.canonical_cache = DiskCache(str(tmp_path / "canonical"), max_bytes=100_000)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        resolved = await normalizer.resolve_canonical_urls(
+            [make_article("https://unknown.example.org/story")], client=client
+        )
+
+    assert resolved[0].url == "https://unknown.example.org/canonical"
+    assert requests == ["https://unknown.example.org/story"]
+    assert normalizer.client is None
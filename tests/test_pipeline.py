@@ -0,0 +1,97 @@
+"""Tests for digest pipeline stages"""
+
+import asyncio
+from datetime import datetime
+
+from sqlmodel import Session, select
+
+from app.config import settings
+from app.models import Article, Source
+from app.pipeline import DigestPipeline
+
+
+async def test_resolved_candidate_urls_are_stored(database, monkeypatch):
+    """Test that canonical URLs found for digest candidates replace the stored URLs"""
+    pipeline = DigestPipeline()
+    with Session(database) as session:
+        for i in range(2):
+            session.add(
+                Article(
+                    title=f"Story {i}",
+                    url=f"https://unknown.example.org/{i}",
+                    published_at=datetime.utcnow(),
+                    content_hash=f"hash-{i}",
+                )
+            )
+        session.commit()
+        candidates = list(session.exec(select(Article).order_by(Article.id)))
+
+    async def fetch_canonical_url(url, client=None):
+        return "https://unknown.example.org/canonical-0" if url.endswith("/0") else ""
+
+    monkeypatch.setattr(pipeline.normalizer, "_fetch_canonical_url", fetch_canonical_url)
+    monkeypatch.setattr(pipeline.normalizer.canonical_cache, "get", lambda key: None)
+    monkeypatch.setattr(pipeline.normalizer.canonical_cache, "set", lambda key, value: None)
+
+    await pipeline._resolve_candidate_urls(candidates)
+
+    with Session(database) as session:
+        stored = session.exec(select(Article).order_by(Article.id)).all()
+    assert [a.url for a in stored] == [
+        "https://unknown.example.org/canonical-0",
+        "https://unknown.example.org/1",
+    ]
+    assert [a.content_hash for a in stored] == ["hash-0", "hash-1"]
+
+
+async def test_busy_host_does_not_hold_global_slots(database, monkeypatch):
+    """Test that sources queued behind a busy host leave global slots to other hosts"""
+    monkeypatch.setattr(settings, "fetch_concurrency", 2)
+    monkeypatch.setattr(settings, "fetch_per_host_concurrency", 1)
+    events = []
+
+    async def fetch_source(source, since, client=None, flights=None, budget=None):
+        events.append(f"start {source.name}")
+        await asyncio.sleep(0.05)
+        events.append(f"end {source.name}")
+        return []
+
+    pipeline = DigestPipeline()
+    monkeypatch.setattr(pipeline, "_fetch_source", fetch_source)
+    sources = [
+        Source(id=1, name="busy-1", type="busy"),
+        Source(id=2, name="busy-2", type="busy"),
+        Source(id=3, name="other", type="other"),
+    ]
+
+    await pipeline._fetch_articles(datetime.utcnow(), sources=sources)
+
+    # busy-2 waits for its host without taking the second global slot, so "other" runs now
+    assert events.index("start other") < events.index("end busy-1")
+
+
+async def test_empty_replay_is_not_delivered(database, tmp_path, monkeypatch):
+    """Test that replaying a past date with nothing archived saves a digest but sends nothing"""
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path))
+    pipeline = DigestPipeline()
+    with Session(database) as session:
+        source = Source(name="feed", type="rss")
+        source.config = {"url": "https://publisher.example.com/feed"}
+        session.add(source)
+        session.commit()
+
+    delivered = []
+
+    async def deliver_digest(*args):
+        delivered.append(args)
+
+    monkeypatch.setattr(pipeline, "_deliver_digest", deliver_digest)
+    monkeypatch.setattr(
+        pipeline.renderer, "render", lambda summary, date: {"html_path": None, "md_path": None}
+    )
+
+    digest = await pipeline.run("2026-01-05", replay=True)
+
+    assert digest.date == "2026-01-05"
+    assert digest.tl_dr == "No major updates today."
+    assert delivered == []
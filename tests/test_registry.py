@@ -0,0 +1,52 @@
+"""Tests for the lazy ingestor registry"""
+
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from ingestors import BaseIngestor, create_ingestor, get_ingestor_class, registry
+
+
+class DummyIngestor(BaseIngestor):
+    async def fetch_articles(self, since):
+        return []
+
+
+def test_importing_pipeline_does_not_load_ingestor_dependencies():
+    code = (
+        "import sys, app.pipeline; "
+        "print(any(m in sys.modules for m in "
+        "('googleapiclient', 'feedparser', 'ingestors.gmail_enterprise')))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    assert result.stdout.strip() == "False"
+
+
+def test_builtin_type_resolves_on_first_use():
+    ingestor_class = get_ingestor_class("rss")
+
+    assert ingestor_class.__name__ == "RSSIngestor"
+    assert get_ingestor_class("rss") is ingestor_class
+
+
+@pytest.fixture
+def dummy_type(monkeypatch):
+    """Register a lazily imported source type for one test, restoring the registry afterwards"""
+    monkeypatch.setitem(registry._registry, "dummy", f"{__name__}:DummyIngestor")
+
+
+def test_registered_type_is_created_with_dependencies(dummy_type):
+    source = SimpleNamespace(id=7, type="dummy", config={"url": "https://example.com"})
+
+    ingestor = create_ingestor(source, client="client")
+
+    assert isinstance(ingestor, DummyIngestor)
+    assert ingestor.source_id == 7
+    assert ingestor.client == "client"
+
+
+def test_unknown_type_returns_none():
+    assert create_ingestor(SimpleNamespace(id=1, type="fax", config={})) is None
@@ -0,0 +1,165 @@
+"""Tests for the RSS ingestor"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.http_client import SingleFlight
+from ingestors.rss import RSSIngestor
+
+FEED_URL = "https://publisher.example.com/feed"
+
+
+def make_feed(*titles: str) -> bytes:
+    published = datetime.now(timezone.utc) - timedelta(hours=1)
+    items = "".join(
+        f"<item><title>{title}</title><link>https://publisher.example.com/{i}</link>"
+        f"<pubDate>{published:%a, %d %b %Y %H:%M:%S} +0000</pubDate></item>"
+        for i, title in enumerate(titles)
+    )
+    return f"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Publisher</title>{items}</channel></rss>""".encode()
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    """Body that drops the connection after the first chunk"""
+
+    def __init__(self, first_chunk: bytes):
+        self.first_chunk = first_chunk
+
+    async def __aiter__(self):
+        yield self.first_chunk
+        raise httpx.ReadError("Connection reset")
+
+
+async def test_validators_saved_only_after_body_is_ingested(database):
+    """Test that a body lost mid-download is not later skipped as not modified"""
+    body = make_feed("Gulf bourses rally")
+    requests = []
+
+    def handler(request):
+        requests.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        if len(requests) == 1:
+            return httpx.Response(200, headers={"ETag": '"v1"'}, stream=BrokenStream(body[:40]))
+        return httpx.Response(200, headers={"ETag": '"v1"'}, content=body)
+
+    since = datetime.now(timezone.utc) - timedelta(hours=24)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        broken = RSSIngestor(1, {"url": FEED_URL, "websub": False}, client=client)
+        assert await broken.fetch_articles(since) == []
+        assert broken.errors
+
+        retried = await RSSIngestor(
+            1, {"url": FEED_URL, "websub": False}, client=client
+        ).fetch_articles(since)
+        unchanged = await RSSIngestor(
+            1, {"url": FEED_URL, "websub": False}, client=client
+        ).fetch_articles(since)
+
+    assert [a.title for a in retried] == ["Gulf bourses rally"]
+    assert unchanged == []
+    assert requests == [None, None, '"v1"']
+
+
+async def test_sources_sharing_a_feed_download_it_once(database):
+    """Two sources on one feed URL share a download but get their own articles"""
+    requests = []
+
+    def handler(request):
+        requests.append(str(request.url))
+        return httpx.Response(200, content=make_feed("Gulf bourses rally"))
+
+    since = datetime.now(timezone.utc) - timedelta(hours=24)
+    flights = SingleFlight()
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        results = await asyncio.gather(
+            *(
+                RSSIngestor(
+                    source_id, {"url": FEED_URL, "websub": False}, client=client, flights=flights
+                ).fetch_articles(since)
+                for source_id in (1, 2)
+            )
+        )
+
+    assert requests == [FEED_URL]
+    assert [[(a.source_id, a.title) for a in articles] for articles in results] == [
+        [(1, "Gulf bourses rally")],
+        [(2, "Gulf bourses rally")],
+    ]
+
+
+async def test_consumer_timeout_keeps_shared_download(database):
+    """A source giving up on a shared feed does not cancel the download for the other"""
+    release = asyncio.Event()
+    requests = []
+
+    async def handler(request):
+        requests.append(str(request.url))
+        await release.wait()
+        return httpx.Response(200, content=make_feed("Gulf bourses rally"))
+
+    since = datetime.now(timezone.utc) - timedelta(hours=24)
+    flights = SingleFlight()
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        first, second = (
+            RSSIngestor(
+                source_id, {"url": FEED_URL, "websub": False}, client=client, flights=flights
+            )
+            for source_id in (1, 2)
+        )
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(first.fetch_articles(since), 0.05)
+
+        waiting = asyncio.ensure_future(second.fetch_articles(since))
+        release.set()
+        articles = await waiting
+
+    assert requests == [FEED_URL]
+    assert [(a.source_id, a.title) for a in articles] == [(2, "Gulf bourses rally")]
+
+
+class SlowStream(httpx.AsyncByteStream):
+    """Body that only arrives once released"""
+
+    def __init__(self, body: bytes, release: asyncio.Event):
+        self.body = body
+        self.release = release
+
+    async def __aiter__(self):
+        await self.release.wait()
+        yield self.body
+
+
+async def test_timed_out_consumer_does_not_save_validators(database):
+    """A download finishing after its only consumer gave up is fetched again next run"""
+    release = asyncio.Event()
+    requests = []
+
+    def handler(request):
+        requests.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        body = make_feed("Gulf bourses rally")
+        return httpx.Response(200, headers={"ETag": '"v1"'}, stream=SlowStream(body, release))
+
+    since = datetime.now(timezone.utc) - timedelta(hours=24)
+    config = {"url": FEED_URL, "websub": False}
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        flights = SingleFlight()
+        timed_out = RSSIngestor(1, config, client=client, flights=flights)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(timed_out.fetch_articles(since), 0.05)
+
+        # Let the shielded download finish in the background
+        release.set()
+        await flights.do(FEED_URL, lambda: timed_out._load_feed(since))
+
+        next_run = await RSSIngestor(1, config, client=client).fetch_articles(since)
+
+    assert [a.title for a in next_run] == ["Gulf bourses rally"]
+    assert requests == [None, None]
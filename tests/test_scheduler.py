@@ -0,0 +1,131 @@
+"""Tests for background ingestion scheduling and digests built from stored articles"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app import scheduler as scheduler_module
+from app.config import settings
+from app.models import Article, Source
+from app.scheduler import DigestScheduler
+
+
+@pytest.fixture
+def sources(database):
+    """An RSS source on the default interval, one polled every 5 minutes, one pushed"""
+    with Session(database) as session:
+        created = [
+            Source(name="default", type="rss"),
+            Source(name="fast", type="rss"),
+            Source(name="pushed", type="rss"),
+        ]
+        created[0].config = {"url": "https://default.example.com/feed"}
+        created[1].config = {"url": "https://fast.example.com/feed", "poll_interval_minutes": 5}
+        created[2].config = {"url": "https://pushed.example.com/feed"}
+        session.add_all(created)
+        session.commit()
+        for source in created:
+            session.refresh(source)
+        return {source.name: source.id for source in created}
+
+
+@pytest.fixture
+def scheduler(sources, monkeypatch):
+    scheduler = DigestScheduler()
+    scheduler.polled = []
+
+    async def ingest(since, due):
+        scheduler.polled.append(sorted(source.name for source in due))
+        return 0
+
+    monkeypatch.setattr(scheduler.pipeline, "ingest", ingest)
+    monkeypatch.setattr(scheduler_module, "active_source_ids", lambda: {sources["pushed"]})
+    return scheduler
+
+
+def elapse(scheduler, minutes):
+    """Move every scheduled poll earlier, as if time had passed"""
+    for source_id in scheduler._next_poll:
+        scheduler._next_poll[source_id] -= minutes * 60
+
+
+async def test_sources_are_polled_on_their_own_interval(scheduler, sources):
+    """Each source is polled again once its own interval has elapsed"""
+    await scheduler._ingest_due_sources()
+    await scheduler._ingest_due_sources()  # Nothing is due yet
+
+    elapse(scheduler, 6)
+    await scheduler._ingest_due_sources()
+
+    elapse(scheduler, settings.ingest_poll_interval_minutes)
+    await scheduler._ingest_due_sources()
+
+    assert scheduler.polled == [["default", "fast", "pushed"], ["fast"], ["default", "fast"]]
+
+
+async def test_pushed_sources_use_fallback_interval(scheduler, sources):
+    """Sources receiving WebSub pushes are only polled at the fallback interval"""
+    started = time.monotonic()
+    await scheduler._ingest_due_sources()
+
+    next_poll = {
+        name: scheduler._next_poll[source_id] - started for name, source_id in sources.items()
+    }
+    assert next_poll["fast"] == pytest.approx(5 * 60, abs=5)
+    assert next_poll["default"] == pytest.approx(settings.ingest_poll_interval_minutes * 60, abs=5)
+    assert next_poll["pushed"] == pytest.approx(settings.websub_fallback_poll_minutes * 60, abs=5)
+
+    elapse(scheduler, settings.websub_fallback_poll_minutes)
+    await scheduler._ingest_due_sources()
+
+    assert scheduler.polled[-1] == ["default", "fast", "pushed"]
+
+
+async def test_run_now_builds_digest_from_stored_articles(sources, database, monkeypatch):
+    """With background ingestion running, a digest reads the database and fetches nothing"""
+    scheduler = DigestScheduler()
+    scheduler.ingesting = True
+    pipeline = scheduler.pipeline
+
+    now = datetime.utcnow()
+    with Session(database) as session:
+        for i, age in enumerate([1, 2, 30]):
+            session.add(
+                Article(
+                    source_id=sources["default"],
+                    title=f"Stored story {i}",
+                    url=f"https://default.example.com/{i}",
+                    published_at=now - timedelta(hours=age),
+                    content_hash=f"stored-{i}",
+                )
+            )
+        session.commit()
+
+    async def no_fetch(*args, **kwargs):
+        raise AssertionError("The digest must not fetch sources")
+
+    summarized = []
+
+    async def summarize(articles, date):
+        summarized.extend(article.title for article in articles)
+        return {"tl_dr": "Stored stories", "sections": {}}
+
+    async def nothing(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(pipeline, "ingest", no_fetch)
+    monkeypatch.setattr(pipeline, "_fetch_articles", no_fetch)
+    monkeypatch.setattr(pipeline, "_resolve_candidate_urls", nothing)
+    monkeypatch.setattr(pipeline, "_deliver_digest", nothing)
+    monkeypatch.setattr(pipeline.summarizer, "summarize", summarize)
+    monkeypatch.setattr(
+        pipeline.renderer, "render", lambda summary, date: {"html_path": None, "md_path": None}
+    )
+
+    digest = await scheduler.run_now()
+
+    assert digest is not None
+    assert sorted(summarized) == ["Stored story 0", "Stored story 1"]
+    assert sorted(item["title"] for item in digest.items) == ["Stored story 0", "Stored story 1"]
@@ -0,0 +1,106 @@
+"""Tests for per-source deadlines and the circuit breaker in the fetch stage"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app import source_health
+from app.config import settings
+from app.models import Source
+from app.pipeline import DigestPipeline
+from ingestors import BaseIngestor, registry
+
+
+class HangingIngestor(BaseIngestor):
+    async def fetch_articles(self, since):
+        await asyncio.sleep(60)
+        return []
+
+
+class FailingIngestor(BaseIngestor):
+    async def fetch_articles(self, since):
+        self._record_error("HTTP error fetching feed: 503")
+        return []
+
+
+@pytest.fixture
+def fake_types(monkeypatch):
+    """Register the fake source types for one test, restoring the registry afterwards"""
+    monkeypatch.setitem(registry._registry, "hanging", HangingIngestor)
+    monkeypatch.setitem(registry._registry, "failing", FailingIngestor)
+
+
+@pytest.fixture
+def make_source(database, fake_types):
+    def make(source_type):
+        source = Source(name=f"{source_type} source", type=source_type)
+        source.config = {}
+        with Session(database) as session:
+            session.add(source)
+            session.commit()
+            session.refresh(source)
+        return source
+
+    return make
+
+
+def test_circuit_opens_after_threshold_and_backs_off(database, monkeypatch):
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 2)
+    monkeypatch.setattr(settings, "breaker_backoff_minutes", 10)
+
+    assert source_health.record_failure(1, "boom") is None
+    first = source_health.record_failure(1, "boom")
+    second = source_health.record_failure(1, "boom")
+
+    assert first - datetime.utcnow() == pytest.approx(
+        timedelta(minutes=10), abs=timedelta(seconds=5)
+    )
+    assert second - datetime.utcnow() == pytest.approx(
+        timedelta(minutes=20), abs=timedelta(seconds=5)
+    )
+    assert set(source_health.open_circuits([1, 2])) == {1}
+
+
+def test_success_closes_circuit(database, monkeypatch):
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 1)
+    source_health.record_failure(1, "boom")
+
+    source_health.record_success(1)
+
+    assert source_health.open_circuits([1]) == {}
+    assert source_health.list_health()[0].consecutive_failures == 0
+
+
+async def test_hanging_source_times_out_and_is_counted(make_source, monkeypatch):
+    monkeypatch.setattr(settings, "fetch_source_timeout_seconds", 0.1)
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 1)
+    source = make_source("hanging")
+
+    articles = await DigestPipeline()._fetch_articles(datetime.utcnow(), sources=[source])
+
+    assert articles == []
+    assert "timed out" in source_health.list_health()[0].last_error
+    assert source.id in source_health.open_circuits([source.id])
+
+
+async def test_open_circuit_skips_source(make_source, monkeypatch):
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 1)
+    source = make_source("failing")
+
+    pipeline = DigestPipeline()
+    await pipeline._fetch_articles(datetime.utcnow(), sources=[source])
+    await pipeline._fetch_articles(datetime.utcnow(), sources=[source])
+
+    # The second run skipped the source, so only one failure was counted
+    assert source_health.list_health()[0].consecutive_failures == 1
+
+
+async def test_run_budget_is_not_held_against_the_source(make_source, monkeypatch):
+    monkeypatch.setattr(settings, "fetch_run_budget_seconds", 0.1)
+    source = make_source("hanging")
+
+    await DigestPipeline()._fetch_articles(datetime.utcnow(), sources=[source])
+
+    assert source_health.list_health() == []
@@ -0,0 +1,54 @@
+"""Tests for batch text cleaning"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.config import settings
+from app.processors.text_cleaner import clean_batch, clean_text, clean_title
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "Plain   summary\nover two lines",
+        "Oil &amp; gas exports rise",
+        "<p>Egypt's <b>inflation</b> eased</p><p>to 25%</p>",
+        '<div><a href="/x">Read more</a> &mdash; <img src="a.png"></div>',
+        "Unclosed <em>markup",
+        "<!-- comment --><p>Body</p>",
+        "<style>p{}</style>Hi",
+        "<script>var a=1;</script><p>x</p>",
+        '<p>Gallery<style type="text/css">.gallery { margin: auto; }</style> photos</p>',
+    ],
+)
+def test_clean_text_matches_html_parser(raw):
+    """Test that the fast paths give the same text as a full BeautifulSoup parse"""
+    expected = " ".join(BeautifulSoup(raw, "html.parser").get_text().split())
+    assert clean_text(raw) == expected
+
+
+def test_clean_text_empty():
+    assert clean_text("") == ""
+    assert clean_text(None) == ""
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("BREAKING: Suez traffic resumes", "Suez traffic resumes"),
+        ("<b>Gold</b>   hits record - REUTERS", "Gold hits record"),
+        ("", "Untitled"),
+    ],
+)
+def test_clean_title(raw, expected):
+    assert clean_title(raw) == expected
+
+
+async def test_clean_batch_shards_in_order(monkeypatch):
+    """Test that sharded batches come back complete and in input order"""
+    monkeypatch.setattr(settings, "clean_shard_size", 3)
+    items = [(f"Title {i}", f"<p>Summary {i}</p>", None) for i in range(10)]
+
+    cleaned = await clean_batch(items)
+
+    assert cleaned == [(f"Title {i}", f"Summary {i}", None) for i in range(10)]
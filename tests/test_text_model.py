@@ -0,0 +1,184 @@
+"""Tests for the trained text classifier"""
+
+import os
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from sqlmodel import Session  # noqa: E402
+
+from app.cache import DiskCache  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.models import Article  # noqa: E402
+from app.processors.classifier import ArticleClassifier  # noqa: E402
+from app.processors.text_model import TextModel, get_text_model, train_from_database  # noqa: E402
+
+CORPUS = {
+    ("EGYPT", "LOGISTICS_SHIPPING"): "Alexandria terminal handles record container volumes",
+    ("EGYPT", "POLICY_REGULATION"): "Cairo cabinet approves new investment law",
+    ("KSA", "LOGISTICS_SHIPPING"): "Jeddah terminal handles record container volumes",
+    ("KSA", "POLICY_REGULATION"): "Riyadh cabinet approves new investment law",
+}
+
+
+def _corpus(copies: int = 25):
+    texts, regions, sections = [], [], []
+    for (region, section), text in CORPUS.items():
+        for i in range(copies):
+            texts.append(f"{text} update {i}")
+            regions.append(region)
+            sections.append(section)
+    return texts, regions, sections
+
+
+@pytest.fixture
+def model():
+    texts, regions, sections = _corpus()
+    return TextModel.train(texts, {"region": regions, "section": sections}, num_features=2**12)
+
+
+@pytest.fixture
+def model_file(model, tmp_path, monkeypatch):
+    path = tmp_path / "classifier_model.npz"
+    model.save(path)
+    monkeypatch.setattr(settings, "classifier_model_path", str(path))
+    return path
+
+
+def test_predicts_whole_batch(model):
+    """Region and section come from one pass over the batch"""
+    predictions = model.predict(
+        ["Cairo cabinet approves new law", "Jeddah terminal handles containers"]
+    )
+
+    assert predictions["region"] == ["EGYPT", "KSA"]
+    assert predictions["section"] == ["POLICY_REGULATION", "LOGISTICS_SHIPPING"]
+
+
+def test_unsure_predictions_are_left_out(model):
+    """Texts without known words, or below the confidence threshold, get no label"""
+    predictions = model.predict(["", "cabinet terminal"], min_confidence=0.99)
+
+    assert predictions["region"] == [None, None]
+
+
+def test_skips_heads_without_enough_labels():
+    """A head needs at least two classes with enough examples"""
+    texts, regions, _ = _corpus()
+    model = TextModel.train(texts, {"region": regions, "section": [None] * len(texts)})
+
+    assert model.heads == ["region"]
+
+
+def test_save_and_load(model, model_file):
+    """A saved model predicts the same after loading"""
+    loaded = TextModel.load(model_file)
+    texts = ["Riyadh approves investment law", "Alexandria container terminal"]
+
+    assert loaded.heads == model.heads
+    assert loaded.predict(texts) == model.predict(texts)
+    assert get_text_model() is get_text_model()  # Loaded once while the file is unchanged
+
+
+def test_classify_batch_uses_model(model_file):
+    """The classifier uses the model, and keywords where the model has no answer"""
+    articles = [
+        Article(
+            title="Jeddah terminal handles record volumes",
+            url="https://example.com/1",
+            published_at=datetime.utcnow(),
+            content_hash="a",
+        ),
+        Article(
+            title="",
+            summary_raw="",
+            url="https://example.com/2",
+            published_at=datetime.utcnow(),
+            content_hash="b",
+        ),
+    ]
+
+    ArticleClassifier().classify_batch(articles)
+
+    assert (articles[0].region_tag, articles[0].section_tag) == ("KSA", "LOGISTICS_SHIPPING")
+    assert (articles[1].region_tag, articles[1].section_tag) == ("MENA", "GENERAL")
+
+
+def test_empty_batch(model):
+    """An empty batch predicts nothing"""
+    assert model.predict([]) == {"region": [], "section": []}
+
+
+def test_warm_batch_with_model(model_file, tmp_path):
+    """A batch served entirely from the processing cache classifies nothing again"""
+    classifier = ArticleClassifier()
+    classifier.processing_cache = DiskCache(str(tmp_path / "processed"), max_bytes=100_000)
+
+    def batch():
+        article = Article(
+            title="Riyadh cabinet approves investment law",
+            url="https://example.com/1",
+            published_at=datetime.utcnow(),
+            content_hash="a",
+        )
+        return classifier.classify_batch([article])[0]
+
+    first, second = batch(), batch()
+
+    assert (first.region_tag, first.section_tag) == ("KSA", "POLICY_REGULATION")
+    assert (second.region_tag, second.section_tag) == (first.region_tag, first.section_tag)
+
+
+def test_numpy_not_imported_without_model(tmp_path):
+    """Importing the pipeline does not pay for NumPy when no model file exists"""
+    code = (
+        "import sys; import app.pipeline; "
+        "from app.processors.text_model import get_text_model; "
+        "assert get_text_model() is None; print('numpy' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parent.parent,
+        env={**os.environ, "CLASSIFIER_MODEL_PATH": str(tmp_path / "missing.npz")},
+    )
+
+    assert result.stdout.strip().splitlines()[-1] == "False", result.stderr
+
+
+def test_train_from_database(database, tmp_path):
+    """Training reads tagged articles from the articles table"""
+    texts, regions, sections = _corpus()
+    with Session(database) as session:
+        for i, (text, region, section) in enumerate(zip(texts, regions, sections)):
+            session.add(
+                Article(
+                    title=text,
+                    url=f"https://example.com/{i}",
+                    published_at=datetime.utcnow(),
+                    content_hash=str(i),
+                    region_tag=region,
+                    section_tag=section,
+                )
+            )
+        session.commit()
+
+    path = tmp_path / "trained.npz"
+    model = train_from_database(path)
+
+    assert path.exists()
+    assert model.predict(["Cairo cabinet approves law"])["region"] == ["EGYPT"]
+
+
+def test_train_from_database_needs_labels(database, tmp_path):
+    """Nothing is written without enough labelled articles"""
+    path = tmp_path / "trained.npz"
+
+    assert train_from_database(path) is None
+    assert not path.exists()
@@ -0,0 +1,224 @@
+"""Tests for WebSub push ingestion against a local hub stand-in"""
+
+import hashlib
+import hmac
+import secrets
+from urllib.parse import parse_qs
+
+import feedparser
+import httpx
+import pytest
+from sqlmodel import Session, select
+
+from app import websub
+from app.main import app, scheduler
+from app.models import Source, WebSubSubscription
+
+CALLBACK_BASE = "http://digest.test"
+HUB_URL = "https://hub.example.com/"
+TOPIC_URL = "https://publisher.example.com/feed"
+
+FEED = f"""<?xml version="1.0"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>
+<title>Publisher</title>
+<atom:link rel="hub" href="{HUB_URL}"/>
+<atom:link rel="self" href="{TOPIC_URL}"/>
+<item><title>Suez Canal traffic rises</title><link>https://publisher.example.com/a</link></item>
+</channel></rss>""".encode()
+
+
+class LocalHub:
+    """In-process WebSub hub: accepts subscriptions, verifies intent and distributes content"""
+
+    def __init__(self):
+        # The hub reaches the subscriber's callbacks straight through the ASGI app
+        self.subscriber = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+        self.requests = []
+        self.subscriptions = {}  # topic -> (callback, secret)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """Accept a subscription request (verification happens later, as with real hubs)"""
+        form = {key: values[0] for key, values in parse_qs(request.content.decode()).items()}
+        self.requests.append(form)
+        return httpx.Response(202)
+
+    async def verify_pending(self):
+        """Verify intent of every pending request against the subscriber's callback"""
+        for form in self.requests:
+            challenge = secrets.token_hex(8)
+            response = await self.subscriber.get(
+                form["hub.callback"],
+                params={
+                    "hub.mode": form["hub.mode"],
+                    "hub.topic": form["hub.topic"],
+                    "hub.challenge": challenge,
+                    "hub.lease_seconds": "3600",
+                },
+            )
+            if response.status_code != 200 or response.text != challenge:
+                continue
+            if form["hub.mode"] == "subscribe":
+                self.subscriptions[form["hub.topic"]] = (form["hub.callback"], form["hub.secret"])
+            else:
+                self.subscriptions.pop(form["hub.topic"], None)
+        self.requests = []
+
+    async def publish(self, topic: str, body: bytes, secret: str = None) -> httpx.Response:
+        """Distribute new content to the topic's subscriber"""
+        callback, subscription_secret = self.subscriptions[topic]
+        digest = hmac.new(
+            (secret or subscription_secret).encode(), body, hashlib.sha256
+        ).hexdigest()
+        return await self.subscriber.post(
+            callback,
+            content=body,
+            headers={"Content-Type": "application/rss+xml", "X-Hub-Signature": f"sha256={digest}"},
+        )
+
+
+@pytest.fixture
+def source(database):
+    with Session(database) as session:
+        source = Source(name="Publisher", type="rss")
+        source.config = {"url": TOPIC_URL}
+        session.add(source)
+        session.commit()
+        session.refresh(source)
+        return source
+
+
+@pytest.fixture
+def hub():
+    return LocalHub()
+
+
+@pytest.fixture
+def pushed(monkeypatch):
+    """Capture what the callback hands to the ingestion pipeline"""
+    calls = []
+
+    async def ingest_pushed(source_id, body):
+        calls.append((source_id, body))
+        return 1
+
+    monkeypatch.setattr(scheduler.pipeline, "ingest_pushed", ingest_pushed)
+    return calls
+
+
+async def _subscribe(hub, source):
+    """Discover the hub from the feed and run the full subscription handshake"""
+    hub_url, topic_url = websub.discover_hub(feedparser.parse(FEED))
+    websub.record_hub(source.id, hub_url, topic_url)
+
+    subscriber = websub.WebSubSubscriber(callback_base_url=CALLBACK_BASE)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(hub.handle)) as client:
+        assert await subscriber.renew(client) == 1
+
+    await hub.verify_pending()
+
+
+def test_discover_hub():
+    """Test hub and topic discovery from feed links"""
+    assert websub.discover_hub(feedparser.parse(FEED)) == (HUB_URL, TOPIC_URL)
+
+
+async def test_subscription_handshake(hub, source):
+    """Test that the hub's verification of intent activates the subscription"""
+    await _subscribe(hub, source)
+
+    assert TOPIC_URL in hub.subscriptions
+    assert websub.active_source_ids() == {source.id}
+
+
+async def test_verification_rejects_wrong_topic(hub, source, database):
+    """Test that verification for a topic we did not request is refused"""
+    websub.record_hub(source.id, HUB_URL, TOPIC_URL)
+    with Session(database) as session:
+        subscription = session.exec(select(WebSubSubscription)).one()
+
+    response = await hub.subscriber.get(
+        websub.WebSubSubscriber(CALLBACK_BASE).callback_url(subscription),
+        params={
+            "hub.mode": "subscribe",
+            "hub.topic": "https://evil.example/",
+            "hub.challenge": "x",
+        },
+    )
+
+    assert response.status_code == 404
+    assert websub.active_source_ids() == set()
+
+
+async def test_unsolicited_verification_is_rejected(hub, source, database):
+    """Test that verifications without the callback token or an outstanding request fail"""
+    await _subscribe(hub, source)
+    with Session(database) as session:
+        subscription = session.exec(select(WebSubSubscription)).one()
+    params = {"hub.topic": TOPIC_URL, "hub.challenge": "x"}
+
+    # Guessing the callback URL from the sequential ID does not work
+    for mode in ("subscribe", "unsubscribe"):
+        response = await hub.subscriber.get(
+            f"{CALLBACK_BASE}/websub/callback/{subscription.id}/guess",
+            params={**params, "hub.mode": mode},
+        )
+        assert response.status_code == 404
+
+    # Even with the token, an unsubscribe we never requested is refused
+    response = await hub.subscriber.get(
+        websub.WebSubSubscriber(CALLBACK_BASE).callback_url(subscription),
+        params={**params, "hub.mode": "unsubscribe"},
+    )
+
+    assert response.status_code == 404
+    assert websub.active_source_ids() == {source.id}
+
+
+async def test_inactive_source_is_unsubscribed(hub, source, database):
+    """Test that switching a source off unsubscribes it through the hub"""
+    await _subscribe(hub, source)
+    with Session(database) as session:
+        stored = session.get(Source, source.id)
+        stored.is_active = False
+        session.add(stored)
+        session.commit()
+
+    subscriber = websub.WebSubSubscriber(callback_base_url=CALLBACK_BASE)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(hub.handle)) as client:
+        assert await subscriber.renew(client) == 1
+
+    assert [form["hub.mode"] for form in hub.requests] == ["unsubscribe"]
+    await hub.verify_pending()
+
+    with Session(database) as session:
+        assert session.exec(select(WebSubSubscription)).one().status == "unsubscribed"
+
+
+async def test_pushed_content_is_ingested(hub, source, pushed):
+    """Test that signed content from the hub goes to the ingestion pipeline"""
+    await _subscribe(hub, source)
+
+    response = await hub.publish(TOPIC_URL, FEED)
+
+    assert response.status_code == 202
+    assert pushed == [(source.id, FEED)]
+
+
+async def test_badly_signed_content_is_ignored(hub, source, pushed):
+    """Test that content with a wrong signature is acknowledged but not ingested"""
+    await _subscribe(hub, source)
+
+    response = await hub.publish(TOPIC_URL, FEED, secret="not-the-secret")
+
+    assert response.status_code == 202
+    assert pushed == []
+
+
+def test_verify_signature():
+    """Test signature checking for supported and unsupported methods"""
+    body = b"payload"
+    digest = hmac.new(b"secret", body, hashlib.sha1).hexdigest()
+
+    assert websub.verify_signature("secret", body, f"sha1={digest}")
+    assert not websub.verify_signature("secret", body, f"md5={digest}")
+    assert not websub.verify_signature("secret", body, None)